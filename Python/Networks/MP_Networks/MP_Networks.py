@@ -14,6 +14,11 @@ import sys
 import os
 import networkx
 import csv
+import numpy
+from scipy import sparse,stats
+
+# Columns of the MP attendance data
+FIELDNAMES=["MP.Name","Date","Event","Type","Numbers","Venue.s."]
 
 def get_bipartite_proj(G,proj1_name=None,proj2_name=None):
     """docstring for get_bipartite_proj
@@ -31,22 +36,228 @@ def get_bipartite_proj(G,proj1_name=None,proj2_name=None):
         raise networkx.NetworkXError("Network is not bipartite")
         
         
+def sparse_bipartite_proj(G,nodes=None,proj1_name=None,proj2_name=None,weight="weight",collaboration=False,as_graphs=True):
+    """docstring for sparse_bipartite_proj
+    As get_bipartite_proj, but computes the projections 
+    as products of the sparse biadjacency matrix B of G,
+    B*B.T for the nodes in nodes (by default, the first of
+    networkx.bipartite_sets) and B.T*B for the rest. Edges
+    are weighted by the sum over their shared neighbours 
+    of the product of the two edge weights; if 
+    collaboration is True, by Newman's collaboration 
+    weight, the sum of 1/(k-1) over shared neighbours of 
+    degree k. Returns two graphs, or if as_graphs is False
+    two (nodes,matrix) pairs of a node list and its 
+    projection as a scipy.sparse CSR matrix
+    """
+    if nodes is None:
+        if not networkx.is_bipartite(G):
+            raise networkx.NetworkXError("Network is not bipartite")
+        nodes=networkx.bipartite_sets(G)[0]
+    set1,set2,B=biadjacency_matrix(G,nodes,weight)
+    P1,P2=project_matrices(B,collaboration)
+    if as_graphs:
+        return matrix_graph(set1,P1,proj1_name),matrix_graph(set2,P2,proj2_name)
+    return (set1,P1),(set2,P2)
+    
+def biadjacency_matrix(G,nodes,weight="weight"):
+    """docstring for biadjacency_matrix
+    Returns (set1,set2,B) where set1 is a list of nodes,
+    set2 a list of the other nodes of the bipartite graph
+    G, and B the scipy.sparse CSR matrix of the weights of
+    the edges between them (1 for edges without weight)
+    """
+    set1=list(nodes)
+    index1=dict((n,i) for i,n in enumerate(set1))
+    set2=[n for n in G if n not in index1]
+    index2=dict((n,i) for i,n in enumerate(set2))
+    rows=numpy.empty(G.number_of_edges(),dtype=int)
+    cols=numpy.empty(G.number_of_edges(),dtype=int)
+    data=numpy.empty(G.number_of_edges())
+    for i,(u,v,d) in enumerate(G.edges(data=True)):
+        if u not in index1:
+            u,v=v,u
+        if u not in index1 or v not in index2:
+            raise networkx.NetworkXError("Edge %s-%s does not join the two node sets"%(u,v))
+        rows[i]=index1[u]
+        cols[i]=index2[v]
+        data[i]=d.get(weight,1)
+    B=sparse.csr_matrix((data,(rows,cols)),shape=(len(set1),len(set2)))
+    return set1,set2,B
+    
+def project_matrices(B,collaboration=False):
+    """docstring for project_matrices
+    Returns the weighted one-mode projections B*B.T and
+    B.T*B of the biadjacency matrix B, without self-loops,
+    as CSR matrices. See sparse_bipartite_proj
+    """
+    if collaboration:
+        B=(B!=0).astype(float)
+        P1=B*sparse.diags(collaboration_weights(B.sum(0)))*B.T
+        P2=B.T*sparse.diags(collaboration_weights(B.sum(1)))*B
+    else:
+        P1=B*B.T
+        P2=B.T*B
+    return drop_diagonal(P1),drop_diagonal(P2)
+    
+def collaboration_weights(degrees):
+    """docstring for collaboration_weights
+    Returns 1/(k-1) for each degree k, or 0 where k<2
+    """
+    k=numpy.asarray(degrees,dtype=float).ravel()
+    w=numpy.zeros(len(k))
+    w[k>1]=1.0/(k[k>1]-1)
+    return w
+    
+def drop_diagonal(P):
+    """docstring for drop_diagonal
+    Returns the square sparse matrix P, without its
+    diagonal, as a CSR matrix
+    """
+    P=sparse.csr_matrix(P-sparse.diags(P.diagonal()))
+    P.eliminate_zeros()
+    return P
+    
+def backbone_bipartite_proj(G,nodes=None,method="disparity",alpha=0.05,k=10,proj1_name=None,proj2_name=None,weight="weight",chunk_size=1000,as_graphs=True):
+    """docstring for backbone_bipartite_proj
+    As sparse_bipartite_proj, but keeps only the backbone
+    of each projection: with method 'disparity', the edges
+    that are significant at level alpha for either end
+    under Serrano et al.'s disparity filter; with
+    'hypergeometric', the pairs that share significantly
+    more neighbours (at level alpha) than two random sets
+    of their sizes would; with 'topk', each node's k 
+    heaviest edges. The projection is computed chunk_size
+    rows at a time and filtered as it goes, so the full
+    projection is never held in memory
+    """
+    if nodes is None:
+        if not networkx.is_bipartite(G):
+            raise networkx.NetworkXError("Network is not bipartite")
+        nodes=networkx.bipartite_sets(G)[0]
+    set1,set2,B=biadjacency_matrix(G,nodes,weight)
+    P1=filtered_projection(B,method,alpha,k,chunk_size)
+    P2=filtered_projection(B.T.tocsr(),method,alpha,k,chunk_size)
+    if as_graphs:
+        return matrix_graph(set1,P1,proj1_name),matrix_graph(set2,P2,proj2_name)
+    return (set1,P1),(set2,P2)
+    
+def filtered_projection(B,method="disparity",alpha=0.05,k=10,chunk_size=1000):
+    """docstring for filtered_projection
+    Returns the backbone of the projection B*B.T (see
+    backbone_bipartite_proj) as a symmetric CSR matrix, 
+    computing the projection a block of rows at a time
+    """
+    if method not in ("disparity","hypergeometric","topk"):
+        raise networkx.NetworkXError("Unknown backbone method "+str(method))
+    n=B.shape[0]
+    if method=="hypergeometric":
+        B=(B!=0).astype(float)
+        degrees=numpy.asarray(B.sum(1)).ravel()
+    BT=B.T.tocsr()
+    kept=list()
+    for lo in xrange(0,n,chunk_size):
+        P=(B[lo:lo+chunk_size]*BT).tocoo()
+        rows,cols,w=P.row,P.col,P.data
+        off=(rows+lo)!=cols
+        rows,cols,w=rows[off],cols[off],w[off]
+        if method=="disparity":
+            # Significance of each edge for the node of its row
+            strength=numpy.bincount(rows,weights=w,minlength=P.shape[0])
+            degree=numpy.bincount(rows,minlength=P.shape[0])
+            keep=(1.0-w/strength[rows])**(degree[rows]-1)<alpha
+        elif method=="hypergeometric":
+            keep=stats.hypergeom.sf(w-1,B.shape[1],degrees[rows+lo],degrees[cols])<alpha
+        else:
+            # Rank each row's edges by weight, heaviest first
+            order=numpy.lexsort((-w,rows))
+            first=numpy.searchsorted(rows[order],numpy.arange(P.shape[0]))
+            rank=numpy.empty(len(order),dtype=int)
+            rank[order]=numpy.arange(len(order))-first[rows[order]]
+            keep=rank<k
+        kept.append((rows[keep]+lo,cols[keep],w[keep]))
+    if kept:
+        rows,cols,w=[numpy.concatenate(c) for c in zip(*kept)]
+    else:
+        rows,cols,w=numpy.zeros(0,dtype=int),numpy.zeros(0,dtype=int),numpy.zeros(0)
+    # An edge kept from either end is kept in both directions
+    u,v=numpy.minimum(rows,cols),numpy.maximum(rows,cols)
+    pairs,first=numpy.unique(u*n+v,return_index=True)
+    u,v,w=u[first],v[first],w[first]
+    return sparse.csr_matrix((numpy.concatenate((w,w)),(numpy.concatenate((u,v)),numpy.concatenate((v,u)))),shape=(n,n))
+    
+def matrix_graph(nodes,P,name=None):
+    """docstring for matrix_graph
+    Returns the weighted Graph with adjacency matrix P,
+    whose rows and columns are nodes
+    """
+    G=networkx.Graph(name=name)
+    G.add_nodes_from(nodes)
+    P=sparse.triu(P,k=1).tocoo()
+    for i,j,w in zip(P.row,P.col,P.data):
+        G.add_edge(nodes[i],nodes[j],weight=w)
+    return G
+        
+        
 def dichotomize(G,thresh,remove_isolates=True):
     """docstring for dichotomize
-    Returns a new Graph where all edges with weight<thresh removed
+    Returns a new Graph where all edges with weight<=thresh 
+    removed, and the rest given weight 1. G is not changed
     """
-    for e in G.edges(data=True):
-        if e[2]["weight"]<=thresh:
-            G.remove_edge(e[0],e[1])
-        else:
-            G.add_edge(e[0],e[1],weight=1)
-    G.name=G.name+" Dichotomized < "+str(thresh)
+    nodes,edges,weights=edge_arrays(G)
+    keep=edges[weights>thresh]
+    D=networkx.Graph(name=G.name+" Dichotomized < "+str(thresh))
     if remove_isolates:
-        deg=G.degree(with_labels=True)
-        deg=deg.items()
-        isos=[(a) for (a,b) in deg if b<1]
-        G.remove_nodes_from(isos)
-    return G
+        D.add_nodes_from(nodes[i] for i in numpy.unique(keep))
+    else:
+        D.add_nodes_from(nodes)
+    D.add_edges_from(((nodes[u],nodes[v]) for u,v in keep),weight=1)
+    return D
+    
+def edge_arrays(G,weight="weight"):
+    """docstring for edge_arrays
+    Returns (nodes,edges,weights) for G, where edges is an
+    array of the edges as pairs of indices into the node 
+    list nodes, and weights an array of their weights
+    """
+    nodes=G.nodes()
+    index=dict((n,i) for i,n in enumerate(nodes))
+    edges=numpy.empty((G.number_of_edges(),2),dtype=int)
+    weights=numpy.empty(G.number_of_edges())
+    for i,(u,v,d) in enumerate(G.edges(data=True)):
+        edges[i]=index[u],index[v]
+        weights[i]=d.get(weight,1)
+    return nodes,edges,weights
+    
+def dichotomize_masks(weights,thresholds):
+    """docstring for dichotomize_masks
+    Returns a boolean array with a row for each threshold,
+    marking the edges (of the weights array) that survive
+    dichotomizing at that threshold
+    """
+    return numpy.asarray(weights)[numpy.newaxis,:]>numpy.asarray(thresholds)[:,numpy.newaxis]
+    
+def threshold_sweep(G,thresholds,weight="weight"):
+    """docstring for threshold_sweep
+    Returns a list with a dict for each threshold of the 
+    number of edges and nodes left after dichotomize(G,
+    threshold) and the number of isolates it removes. 
+    Computed from the sorted edge weights and the largest
+    weight at each node, without building the graphs
+    """
+    nodes,edges,weights=edge_arrays(G,weight)
+    thresholds=numpy.asarray(thresholds,dtype=float)
+    strongest=numpy.zeros(len(nodes))
+    strongest.fill(-numpy.inf)
+    numpy.maximum.at(strongest,edges[:,0],weights)
+    numpy.maximum.at(strongest,edges[:,1],weights)
+    # Edges (nodes) survive a threshold if their (largest) weight is above it
+    num_edges=len(weights)-numpy.searchsorted(numpy.sort(weights),thresholds,side="right")
+    num_nodes=len(nodes)-numpy.searchsorted(numpy.sort(strongest),thresholds,side="right")
+    sweep=list()
+    for t,m,n in zip(thresholds,num_edges,num_nodes):
+        sweep.append(dict(threshold=t,edges=int(m),nodes=int(n),isolates=len(nodes)-int(n)))
+    return sweep
 
 def create_network(data_dict):
     """docstring for create_network
@@ -55,46 +266,70 @@ def create_network(data_dict):
     """
     data_net=networkx.Graph(name="MP Network")
     for pair in data_dict.keys():
-        MP=pair[0].replace(", ","_")
-        Event=pair[1].replace(" ","_")
+        MP,Event=clean_names(*pair)
         # Each edge is weighted by the number of times a
         # Member attended this particular event
         data_net.add_edge(MP,Event,weight=data_dict[pair])
     return data_net
 
+def read_data(csv_file,chunk_size=1048576):
+    """docstring for read_data
+    Streams the rows of the MP data in csv_file as dicts
+    keyed by FIELDNAMES, header row first, as parse_data
+    expects. The file is read chunk_size bytes at a time,
+    so memory use does not grow with the size of the file
+    """
+    f=open(csv_file,"rU",chunk_size)
+    try:
+        for line in csv.DictReader(f,fieldnames=FIELDNAMES):
+            yield line
+    finally:
+        f.close()
+
+def clean_names(MP,Event):
+    """docstring for clean_names
+    Returns the MP and Event names as node labels
+    """
+    return MP.replace(", ","_"),Event.replace(" ","_")
+
 def parse_data(csv_obj):
     """docstring for parse_data
-    Provided a csv.DictReader object, a dic
+    Provided a csv.DictReader object (or read_data), a dict
+    of the number of times each MP attended each event, 
+    keyed by (MP,Event). The first row is taken to be the 
+    header. Rows are counted in a single pass.
     """
-    first=True
-    for line in csv_obj:
-        if first:
-            mp_data=dict()
-            first=False
-        else:
-            data_pair=(line["MP.Name"],line["Event"])
-            if mp_data.keys().count(data_pair)<1:
-                mp_data[data_pair]=1
-            else:
-                mp_data[data_pair]+=1
+    mp_data=dict()
+    rows=iter(csv_obj)
+    next(rows,None)     # Skip header
+    for line in rows:
+        data_pair=(line["MP.Name"],line["Event"])
+        mp_data[data_pair]=mp_data.get(data_pair,0)+1
     return mp_data
 
-def main():
-    # Load and parse raw data
+def main(cache_dir=None):
+    """docstring for main
+    Builds the MP-by-Event network and its projections from
+    MP_DATA_CLEANDATE.csv and writes them as Pajek files.
+    The parsed data are cached in cache_dir, by default
+    attendance_cache.default_cache_dir()
+    """
+    from attendance_cache import load_attendance,attendance_counts
+    from network_io import write_pajek_arrays
+    # Load and parse raw data, or its cached arrays
     csv_file="MP_DATA_CLEANDATE.csv"
-    reader=csv.DictReader(open(csv_file,"rU"),fieldnames=["MP.Name","Date","Event","Type","Numbers","Venue.s."]) 
-    parsed_mp=parse_data(reader)
+    parsed_mp=attendance_counts(load_attendance(csv_file,cache_dir))
     # Create base graph from raw data, and save to file
     G=create_network(parsed_mp)
-    networkx.write_pajek(G,"MP_events.net")
+    write_pajek_arrays("MP_events.net",*edge_arrays(G),name=G.name)
     # Dichotomize data to remove all edges with a weight < 2
     G_dichot=dichotomize(G,thresh=1)
     G_dichot.remove_node("Association")
     networkx.info(G_dichot)
     # Generate MP-by-MP and Event-by-Event projections of the bipartite base graph
     mp_net,event_net=get_bipartite_proj(G_dichot,proj1_name="MP-by-MP",proj2_name="Event-by-Event")
-    networkx.write_pajek(mp_net,"mp_net.net") 
-    networkx.write_pajek(event_net,"event_net.net")
+    write_pajek_arrays("mp_net.net",*edge_arrays(mp_net),name=mp_net.name)
+    write_pajek_arrays("event_net.net",*edge_arrays(event_net),name=event_net.name)
     # Perform some network cleaning for 
 
 if __name__ == '__main__':
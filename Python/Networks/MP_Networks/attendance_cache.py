@@ -0,0 +1,162 @@
+#!/usr/bin/env python
+# encoding: utf-8
+"""
+attendance_cache.py
+
+Columnar cache of the MP attendance data.  The first time a CSV file is
+loaded its records are encoded as NumPy arrays (integer codes into
+sorted lists of MP and event names, and the date of each record) and
+written as .npy files to a cache directory named after the SHA-1 hash
+of the file, by default in the user's cache directory
+(~/.cache/MP_Networks) rather than next to the data.  Later loads of
+the same file memory-map those arrays instead of parsing the text
+again; any change to the file changes its hash, so a stale cache is
+never read.
+
+Created by Drew Conway on 2010-02-12.
+Copyright (c) 2010. All rights reserved.
+"""
+
+import sys
+import os
+import hashlib
+import shutil
+from datetime import datetime
+import numpy
+from MP_Networks import read_data
+
+# Arrays making up a cached data set
+COLUMNS=["mps","events","mp","event","date","pair_mp","pair_event","weight"]
+# Version of the cache layout, part of the cache directory name so that
+# caches written by an older encoding are rebuilt rather than read
+CACHE_VERSION=2
+
+
+def load_attendance(csv_file,cache_dir=None,chunk_size=1048576):
+    """docstring for load_attendance
+    Returns a dict of the MP attendance data in csv_file
+    as arrays: 'mps' and 'events', the sorted names; 'mp',
+    'event' and 'date', the MP and event codes (indices
+    into mps and events) and datetime64 date of each
+    record; and 'pair_mp', 'pair_event' and 'weight', the
+    number of times each MP attended each event. The arrays
+    are memory-mapped from the cache in cache_dir (by
+    default, default_cache_dir()), which is built first
+    if this version of csv_file has not been cached
+    """
+    if cache_dir is None:
+        cache_dir=default_cache_dir()
+    path=os.path.join(cache_dir,os.path.basename(csv_file)+".v%d."%CACHE_VERSION+file_hash(csv_file,chunk_size))
+    if not os.path.isdir(path):
+        write_cache(path,encode_attendance(read_data(csv_file,chunk_size)))
+    data=dict()
+    for c in COLUMNS:
+        data[c]=numpy.load(os.path.join(path,c+".npy"),mmap_mode="r")
+    return data
+
+def default_cache_dir():
+    """docstring for default_cache_dir
+    Returns the per-user cache directory for attendance
+    arrays, MP_Networks under $XDG_CACHE_HOME (by default
+    ~/.cache), so that no cache is written into the
+    source tree next to the data
+    """
+    base=os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"),".cache")
+    return os.path.join(base,"MP_Networks")
+
+def attendance_counts(data):
+    """docstring for attendance_counts
+    Returns the data loaded by load_attendance as the dict
+    of attendance counts keyed by (MP,Event) that
+    parse_data returns, for create_network
+    """
+    mps=data["mps"].tolist()
+    events=data["events"].tolist()
+    counts=dict()
+    for m,e,w in zip(data["pair_mp"].tolist(),data["pair_event"].tolist(),data["weight"].tolist()):
+        counts[(mps[m],events[e])]=w
+    return counts
+
+def encode_attendance(csv_obj):
+    """docstring for encode_attendance
+    Encodes the records of a csv.DictReader object (or
+    read_data), header row first, as the arrays described
+    in load_attendance
+    """
+    mp_codes=dict()
+    event_codes=dict()
+    dates=dict()
+    mp=list()
+    event=list()
+    date=list()
+    rows=iter(csv_obj)
+    next(rows,None)     # Skip header
+    for line in rows:
+        mp.append(mp_codes.setdefault(line["MP.Name"],len(mp_codes)))
+        event.append(event_codes.setdefault(line["Event"],len(event_codes)))
+        if line["Date"] not in dates:
+            dates[line["Date"]]=parse_date(line["Date"])
+        date.append(dates[line["Date"]])
+    # Recode so that codes follow the sorted order of the names
+    mps,mp=sorted_codes(mp_codes,mp)
+    events,event=sorted_codes(event_codes,event)
+    # Combine the codes in int64, as #MPs x #events can exceed 2**31
+    pairs,weight=numpy.unique(mp.astype(numpy.int64)*len(events)+event,return_counts=True)
+    return dict(mps=mps,
+                events=events,
+                mp=mp,
+                event=event,
+                date=numpy.array(date,dtype="datetime64[D]"),
+                pair_mp=(pairs//max(len(events),1)).astype(numpy.int32),
+                pair_event=(pairs%max(len(events),1)).astype(numpy.int32),
+                weight=weight)
+
+def sorted_codes(codes,values):
+    """docstring for sorted_codes
+    Given a dict of names to codes and a list of codes,
+    returns the array of sorted names and the codes as an
+    array of indices into it
+    """
+    names=sorted(codes)
+    recode=numpy.empty(len(names),dtype=numpy.int32)
+    for i,n in enumerate(names):
+        recode[codes[n]]=i
+    return numpy.array(names,dtype=str),recode[numpy.asarray(values,dtype=numpy.int32)]
+
+def parse_date(date):
+    """docstring for parse_date
+    Returns the m/d/yy date string as a datetime64, or
+    NaT if it cannot be parsed
+    """
+    try:
+        return numpy.datetime64(datetime.strptime(date.strip(),"%m/%d/%y").date())
+    except ValueError:
+        return numpy.datetime64("NaT")
+
+def write_cache(path,data):
+    """docstring for write_cache
+    Writes the arrays in data as .npy files in the
+    directory path, atomically
+    """
+    tmp=path+".tmp"
+    if os.path.isdir(tmp):
+        shutil.rmtree(tmp)
+    os.makedirs(tmp)
+    for c in COLUMNS:
+        numpy.save(os.path.join(tmp,c+".npy"),data[c])
+    os.rename(tmp,path)
+
+def file_hash(path,chunk_size=1048576):
+    """docstring for file_hash
+    Returns the SHA-1 hex digest of the file at path
+    """
+    h=hashlib.sha1()
+    f=open(path,"rb")
+    try:
+        chunk=f.read(chunk_size)
+        while chunk:
+            h.update(chunk)
+            chunk=f.read(chunk_size)
+    finally:
+        f.close()
+    return h.hexdigest()
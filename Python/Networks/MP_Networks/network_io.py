@@ -0,0 +1,223 @@
+#!/usr/bin/env python
+# encoding: utf-8
+"""
+network_io.py
+
+Streaming Pajek and GraphML input/output for large weighted networks.
+The writers take a network as arrays (a node list, an edge array of
+node index pairs and an array of edge weights, as returned by
+MP_Networks.edge_arrays or matrix_edges) and write them chunk_size
+lines at a time, formatting each chunk with a single string operation,
+so the whole file is never held in memory.  Files are gzipped if
+compress is True or the path ends in .gz.  The readers return the same
+arrays.
+
+Pajek files are written as networkx.write_pajek writes them: vertices
+numbered from 1 in node order at (0,0), and an edge list with weights.
+
+Created by Drew Conway on 2010-02-18.
+Copyright (c) 2010. All rights reserved.
+"""
+
+import sys
+import os
+import gzip
+from xml.sax.saxutils import quoteattr
+from xml.etree.cElementTree import iterparse
+import numpy
+import networkx
+from scipy import sparse
+
+GRAPHML_NS="http://graphml.graphdrawing.org/xmlns"
+
+
+def write_pajek_arrays(path,nodes,edges,weights=None,name="NetworkX",chunk_size=65536,compress=None):
+    """docstring for write_pajek_arrays
+    Writes the network with node list nodes and edge array
+    edges (pairs of indices into nodes) to path in Pajek
+    format. Edges without weights are given weight 1
+    """
+    edges,weights=edge_columns(edges,weights)
+    fh=open_file(path,"w",compress)
+    try:
+        fh.write("*network %s\n"%name)
+        fh.write("*vertices %d\n"%len(nodes))
+        for i in xrange(0,len(nodes),chunk_size):
+            chunk=nodes[i:i+chunk_size]
+            rows=list()
+            for j,n in enumerate(chunk):
+                rows.extend((i+j+1,n))
+            fh.write(("%d \"%s\" 0.000000 0.000000 ellipse \n"*len(chunk))%tuple(rows))
+        fh.write("*edges\n")
+        for i in xrange(0,len(edges),chunk_size):
+            chunk=numpy.column_stack((edges[i:i+chunk_size]+1,weights[i:i+chunk_size]))
+            fh.write(("%d %d %f \n"*len(chunk))%tuple(chunk.ravel().tolist()))
+    finally:
+        fh.close()
+
+def read_pajek_arrays(path,chunk_size=65536):
+    """docstring for read_pajek_arrays
+    Reads a Pajek file with an undirected edge list, such
+    as write_pajek_arrays writes, returning (name,nodes,
+    edges,weights). Edges are read a chunk at a time
+    """
+    fh=open_file(path,"r")
+    try:
+        line=fh.readline()
+        name=line[len("*network"):].strip() if line.lower().startswith("*network") else ""
+        if not line.lower().startswith("*vertices"):
+            line=fh.readline()
+        if not line.lower().startswith("*vertices"):
+            raise networkx.NetworkXError("Pajek file has no *vertices line")
+        nodes=list()
+        ids=dict()
+        line=fh.readline()
+        while line and not line.startswith("*"):
+            if line.strip():
+                if '"' in line:
+                    # Labels are not escaped, so take up to the last quote
+                    first,last=line.index('"'),line.rindex('"')
+                    id,label=line[:first],line[first+1:last]
+                else:
+                    id,label=line.split()[:2]
+                ids[int(id)]=len(nodes)
+                nodes.append(label)
+            line=fh.readline()
+        if line.lower().startswith("*arcs"):
+            raise networkx.NetworkXError("Directed Pajek files are not supported")
+        chunks=list()
+        lines=fh.readlines(chunk_size)
+        while lines:
+            values=numpy.fromstring(" ".join(lines),sep=" ")
+            if len(values)==2*len(lines):
+                values=numpy.column_stack((values.reshape(-1,2),numpy.ones(len(lines))))
+            elif len(values)==3*len(lines):
+                values=values.reshape(-1,3)
+            else:
+                raise networkx.NetworkXError("Pajek edges must be 'u v' or 'u v weight' lines")
+            chunks.append(values)
+            lines=fh.readlines(chunk_size)
+    finally:
+        fh.close()
+    values=numpy.concatenate(chunks) if chunks else numpy.zeros((0,3))
+    index=numpy.zeros(max(ids)+1 if ids else 1,dtype=int)
+    for id,i in ids.iteritems():
+        index[id]=i
+    edges=index[values[:,:2].astype(int)]
+    return name,nodes,edges,values[:,2]
+
+def write_graphml_arrays(path,nodes,edges,weights=None,name="NetworkX",chunk_size=65536,compress=None):
+    """docstring for write_graphml_arrays
+    Writes the network with node list nodes and edge array
+    edges to path as undirected GraphML, with edge weights
+    as the 'weight' data key
+    """
+    edges,weights=edge_columns(edges,weights)
+    ids=[quoteattr(str(n)) for n in nodes]
+    fh=open_file(path,"w",compress)
+    try:
+        fh.write('<?xml version="1.0" encoding="utf-8"?>\n')
+        fh.write('<graphml xmlns="%s">\n'%GRAPHML_NS)
+        fh.write('<key id="weight" for="edge" attr.name="weight" attr.type="double"/>\n')
+        fh.write('<graph id=%s edgedefault="undirected">\n'%quoteattr(str(name)))
+        for i in xrange(0,len(ids),chunk_size):
+            chunk=ids[i:i+chunk_size]
+            fh.write(("<node id=%s/>\n"*len(chunk))%tuple(chunk))
+        for i in xrange(0,len(edges),chunk_size):
+            rows=list()
+            for (u,v),w in zip(edges[i:i+chunk_size].tolist(),weights[i:i+chunk_size].tolist()):
+                rows.extend((ids[u],ids[v],w))
+            fh.write(('<edge source=%s target=%s><data key="weight">%r</data></edge>\n'*(len(rows)/3))%tuple(rows))
+        fh.write("</graph>\n</graphml>\n")
+    finally:
+        fh.close()
+
+def read_graphml_arrays(path,weight="weight"):
+    """docstring for read_graphml_arrays
+    Reads the first graph of a GraphML file, streaming its
+    elements, and returns (name,nodes,edges,weights). Edges
+    without a weight (the data key whose attr.name is
+    weight) are given weight 1
+    """
+    fh=open_file(path,"r")
+    try:
+        name=""
+        graph=None
+        key=None
+        nodes=list()
+        index=dict()
+        sources=list()
+        targets=list()
+        weights=list()
+        for event,elem in iterparse(fh,events=("start","end")):
+            tag=elem.tag.rsplit("}",1)[-1]
+            if event=="start":
+                if tag=="graph" and graph is None:
+                    graph=elem
+                    name=elem.get("id","")
+                continue
+            if tag=="key" and elem.get("attr.name")==weight and elem.get("for","edge") in ("edge","all"):
+                key=elem.get("id")
+            elif tag=="node":
+                index[elem.get("id")]=len(nodes)
+                nodes.append(elem.get("id"))
+                graph.clear()   # Drop parsed elements from the tree
+            elif tag=="edge":
+                for n in (elem.get("source"),elem.get("target")):
+                    if n not in index:
+                        index[n]=len(nodes)
+                        nodes.append(n)
+                sources.append(index[elem.get("source")])
+                targets.append(index[elem.get("target")])
+                w=1.0
+                for data in elem:
+                    if data.get("key")==key:
+                        w=float(data.text)
+                weights.append(w)
+                graph.clear()
+    finally:
+        fh.close()
+    edges=numpy.column_stack((numpy.array(sources,dtype=int),numpy.array(targets,dtype=int)))
+    return name,nodes,edges.reshape(-1,2),numpy.array(weights)
+
+def arrays_network(name,nodes,edges,weights=None):
+    """docstring for arrays_network
+    Returns the weighted Graph described by the arrays
+    returned by the readers
+    """
+    edges,weights=edge_columns(edges,weights)
+    G=networkx.Graph(name=name)
+    G.add_nodes_from(nodes)
+    for (u,v),w in zip(edges.tolist(),weights.tolist()):
+        G.add_edge(nodes[u],nodes[v],weight=w)
+    return G
+
+def matrix_edges(P):
+    """docstring for matrix_edges
+    Returns (edges,weights) for the symmetric sparse matrix
+    P, e.g. a projection from sparse_bipartite_proj, taking
+    each edge once from the upper triangle
+    """
+    P=sparse.triu(P,k=1).tocoo()
+    return numpy.column_stack((P.row,P.col)),P.data
+
+def edge_columns(edges,weights=None):
+    """docstring for edge_columns
+    Returns the edges as an (m,2) integer array and their
+    weights as a float array, of ones if weights is None
+    """
+    edges=numpy.asarray(edges,dtype=int).reshape(-1,2)
+    if weights is None:
+        weights=numpy.ones(len(edges))
+    return edges,numpy.asarray(weights,dtype=float)
+
+def open_file(path,mode,compress=None):
+    """docstring for open_file
+    Opens path for reading or writing, through gzip if
+    compress is True or path ends in .gz
+    """
+    if compress is None:
+        compress=path.endswith(".gz")
+    if compress:
+        return gzip.open(path,mode+"b")
+    return open(path,mode+"b")
@@ -0,0 +1,176 @@
+#!/usr/bin/env python
+# encoding: utf-8
+"""
+temporal_networks.py
+
+Two-mode MP-by-Event networks, and their weighted one-mode projections,
+over a sliding window of time.  The attendance records (as loaded by
+attendance_cache.load_attendance) are sorted by date once; as the
+window advances the records entering it are added and those leaving it
+subtracted, updating the projection weights in place rather than
+projecting each window from scratch.
+
+The projection weights are those of sparse_bipartite_proj: two MPs are
+joined with weight sum over shared events of the product of their
+attendance counts, and two events likewise over shared MPs.
+
+Created by Drew Conway on 2010-02-15.
+Copyright (c) 2010. All rights reserved.
+"""
+
+import sys
+import os
+import numpy
+import networkx
+from MP_Networks import clean_names
+
+
+class WindowedProjection(object):
+# Attendance counts of the records currently in the window, with both
+# one-mode projections kept up to date as records are added and removed.
+# MPs and events are integer codes into the name arrays mps and events.
+    def __init__(self,mps,events):
+        self.mps=mps
+        self.events=events
+        self.by_mp=dict()       # mp -> {event: count}
+        self.by_event=dict()    # event -> {mp: count}
+        self.mp_proj=dict()     # (mp,mp) -> weight, smaller code first
+        self.event_proj=dict()  # (event,event) -> weight
+        self.records=0
+
+    def add(self,mp,event):
+    # Adds one attendance of mp at event
+        self._shift(self.mp_proj,mp,self.by_event.get(event,{}),1)
+        self._shift(self.event_proj,event,self.by_mp.get(mp,{}),1)
+        _increment(self.by_mp,mp,event,1)
+        _increment(self.by_event,event,mp,1)
+        self.records+=1
+
+    def remove(self,mp,event):
+    # Removes one attendance of mp at event
+        _increment(self.by_mp,mp,event,-1)
+        _increment(self.by_event,event,mp,-1)
+        self._shift(self.mp_proj,mp,self.by_event.get(event,{}),-1)
+        self._shift(self.event_proj,event,self.by_mp.get(mp,{}),-1)
+        self.records-=1
+
+    def _shift(self,proj,n,counts,sign):
+    # A change of one in the count joining n to a shared neighbour
+    # changes n's projection weight to each other node m attending that
+    # neighbour by m's own count there
+        for m,c in counts.iteritems():
+            if m!=n:
+                _increment(proj,(min(n,m),max(n,m)),None,sign*c)
+
+    def bipartite_graph(self,name=None):
+    # Returns the two-mode network of the window, as create_network
+        G=networkx.Graph(name=name)
+        for mp,counts in self.by_mp.iteritems():
+            for event,c in counts.iteritems():
+                G.add_edge(*clean_names(self.mps[mp],self.events[event]),weight=c)
+        return G
+
+    def mp_graph(self,name=None):
+    # Returns the MP-by-MP projection of the window
+        return self._graph(self.mp_proj,self.by_mp,[clean_names(n,"")[0] for n in self.mps],name)
+
+    def event_graph(self,name=None):
+    # Returns the Event-by-Event projection of the window
+        return self._graph(self.event_proj,self.by_event,[clean_names("",n)[1] for n in self.events],name)
+
+    def _graph(self,proj,nodes,labels,name):
+        G=networkx.Graph(name=name)
+        G.add_nodes_from(labels[n] for n in nodes)
+        for (u,v),w in proj.iteritems():
+            G.add_edge(labels[u],labels[v],weight=w)
+        return G
+
+
+def _increment(counts,key,inner,change):
+# Adds change to counts[key] (or counts[key][inner]), deleting entries
+# that fall to zero so that only the current window is kept
+    if inner is not None:
+        d=counts.setdefault(key,dict())
+        d[inner]=d.get(inner,0)+change
+        if d[inner]==0:
+            del d[inner]
+            if len(d)==0:
+                del counts[key]
+    else:
+        counts[key]=counts.get(key,0)+change
+        if counts[key]==0:
+            del counts[key]
+
+
+def window_networks(data,window="month",step=None):
+    """docstring for window_networks
+    Yields (start,end,projection) for successive windows
+    [start,end) of the attendance data from load_attendance,
+    where projection is a WindowedProjection of the records
+    in the window. window and step are 'week', 'month' or
+    a number of days; step defaults to window, and month
+    windows start on the first of the month. The same
+    WindowedProjection is updated in place for each window,
+    so take any graphs needed from it before advancing
+    """
+    if step is None:
+        step=window
+    dated=numpy.flatnonzero(~numpy.isnat(data["date"]))
+    order=dated[numpy.argsort(data["date"][dated],kind="mergesort")]
+    if len(order)==0:
+        return
+    dates=numpy.asarray(data["date"])[order]
+    mp=numpy.asarray(data["mp"])[order].tolist()
+    event=numpy.asarray(data["event"])[order].tolist()
+    window=time_offset(window)
+    step=time_offset(step)
+    first=dates[0]
+    if window[1]=="M" or step[1]=="M":
+        first=first.astype("datetime64[M]").astype("datetime64[D]")
+    projection=WindowedProjection(data["mps"],data["events"])
+    lo=hi=0
+    k=0
+    start=first
+    while start<=dates[-1]:
+        end=advance(start,window)
+        # Subtract the records that have left the window...
+        while lo<hi and dates[lo]<start:
+            projection.remove(mp[lo],event[lo])
+            lo+=1
+        if lo==hi:
+            # ...skipping any the window stepped over entirely...
+            while hi<len(dates) and dates[hi]<start:
+                hi+=1
+            lo=hi
+        # ...and add the records that have entered it
+        while hi<len(dates) and dates[hi]<end:
+            projection.add(mp[hi],event[hi])
+            hi+=1
+        yield start,end,projection
+        k+=1
+        start=advance(first,(k*step[0],step[1]))
+
+def time_offset(spec):
+    """docstring for time_offset
+    Returns 'week', 'month' or a number of days as a
+    (number,unit) pair of a numpy timedelta64
+    """
+    if spec=="week":
+        return 7,"D"
+    if spec=="month":
+        return 1,"M"
+    if int(spec)<1:
+        raise ValueError("Window lengths and steps must be at least one day")
+    return int(spec),"D"
+
+def advance(date,offset):
+    """docstring for advance
+    Returns the datetime64[D] date moved forward by the
+    (number,unit) offset, keeping the day of the month when
+    moving by months
+    """
+    n,unit=offset
+    if unit=="M":
+        month=date.astype("datetime64[M]")
+        return (month+n).astype("datetime64[D]")+(date-month.astype("datetime64[D]"))
+    return date+numpy.timedelta64(n,"D")
@@ -11,7 +11,15 @@ import sys
 import os
 from networkx import *
 import copy
-from numpy import random,histogram
+import time
+from numpy import random,histogram,cumsum,searchsorted,minimum,ones,flatnonzero
+from motif_census import MotifCensus,motif_counts,sample_motif_counts,graph_canonical_form,motif_atlas
+from fitness import *
+from candidate_pool import CandidatePool
+from components import ComponentIndex,stitch_components
+from checkpoint import CheckpointWriter,load_checkpoint
+from compact_graph import CompactGraph
+from instrumentation import run_profile
 
 """
 Algorithm for generating graphs from some base structure, based on work entitled
@@ -20,64 +28,178 @@ Variables:
 base_graph: some set of verticies and edges from which inference will be generated 
 node_ceiling: some N such that when G{V}\ge N the simulation halts and the new graph is returns
 metric: a statisitical operation that takes a NetworkX graph type and returns a graph-level
-measure of structural fitness. This is used to determine which among burnt in graphs is fittest
+measure of structural fitness. This is used to determine which among burnt in graphs is fittest.
+An IncrementalMetric from fitness.py (e.g. Transitivity()) scores candidates from their edge
+delta alone, which is much faster than a plain function such as transitivity
 tau: Number of verticies in the largest single-component graph for which subgraph isomorphisms
 will be counted
 beta: number of graphs to be generated at each growth iteration
 mu: percent of times a graph is generated with endogenous growth rather than exogenous
+samples: if given, the initial isomorphism counts are estimated from this many sampled
+root nodes rather than counted exactly (for large base graphs)
+recount: if given, the isomorphism counts are recounted exactly every recount iterations
+workers: if given, the beta candidates of each iteration are generated and scored across
+this many worker processes. The workers are reseeded from numpy.random every iteration,
+so runs are reproducible for a given numpy.random.seed and number of workers
+checkpoint: file to which a binary checkpoint of the run (see checkpoint.py) is written
+every checkpoint_every iterations, or None for no checkpoints. An interrupted run is
+continued with resume_sirg_graph_generator
+compact: if True, the graph is grown as an array-backed CompactGraph (see compact_graph.py),
+which takes far less memory than a NetworkX graph, and converted back to NetworkX at the end.
+The metric must then be one of the metrics in fitness.py
+profile: a RunProfile (see instrumentation.py), or a file name or open file to write one to.
+Each iteration is then reported as a JSON line, with the time spent in each phase, the
+number of candidates scored and graph copies made, and peak memory. verbose reports
+the same to stdout
 """
-def sirg_graph_generator(base_graph,node_ceiling,metric,tau=4,beta=100,mu=0.15,verbose=False):
-    new_graph=copy.deepcopy(base_graph)
-    graph_count=1
-    while new_graph.number_of_nodes()<node_ceiling:
-        iso_counts=subgraph_distribution(new_graph,tau)  # Get isomorphism counts
-        total_iso=sum(iso_counts.values())              
-        prior_iso_dist=dict.fromkeys(iso_counts.keys()) # Get prior probability dist of sub-isomorphs
-        for g in iso_counts.keys():
-            prior_iso_dist[g]=float(iso_counts[g])/total_iso
-        new_graph=simulate_growth(new_graph,prior_iso_dist,metric,beta,mu)
-        new_graph.name="Graph Iteration: "+str(graph_count)
-        if graph_count % 10<1:
-            # Output progresss every ten iterations
-            write_pajek(new_graph,'progress_estimate'+str(graph_count)+'.net')
-        if verbose:
-            info(new_graph)
-            print 'Number of components: '+str(len(connected_component_subgraphs(new_graph)))
-            print
-        graph_count+=1
-    if len(connected_component_subgraphs(new_graph))>1:
+def sirg_graph_generator(base_graph,node_ceiling,metric,tau=4,beta=100,mu=0.15,verbose=False,samples=None,recount=None,workers=None,checkpoint='progress_estimate.npz',checkpoint_every=10,compact=False,profile=None):
+    profile=run_profile(profile,verbose)
+    start=time.time()
+    if compact:
+        new_graph=CompactGraph.from_networkx(base_graph)
+    else:
+        new_graph=copy.deepcopy(base_graph)
+    census=MotifCensus(new_graph,tau,samples=samples)   # Isomorphism counts, updated as the graph grows
+    if profile is not None:
+        profile.count('copies')
+        profile.event('census',seconds=time.time()-start,motif_classes=len(census.classes))
+    params=dict(node_ceiling=node_ceiling,tau=tau,beta=beta,mu=mu,samples=samples,confidence=census.confidence,recount=recount,checkpoint_every=checkpoint_every,compact=compact)
+    return grow_graph(new_graph,census,1,metric,params,profile,workers,checkpoint)
+    
+def resume_sirg_graph_generator(checkpoint,metric,verbose=False,workers=None,profile=None,node_ceiling=None):
+# Continues the run saved in the file checkpoint by sirg_graph_generator,
+# restoring its graph, motif counts, numpy.random state and parameters.
+# The metric is not saved, so must be given again. If node_ceiling is
+# given the run grows to it rather than to the saved ceiling.
+    new_graph,graph_count,census,params=load_checkpoint(checkpoint)
+    if node_ceiling is not None:
+        params['node_ceiling']=node_ceiling
+    if params.get('compact'):
+        # The checkpoint holds the CompactGraph's own integer nodes, with
+        # the original labels alongside, so keep the nodes (and the index
+        # over them) and restore the labels
+        index=new_graph.graph.get('component_index')
+        new_graph=CompactGraph.from_networkx(new_graph,new_graph.graph.get('labels',dict()))
+        if index is not None:
+            new_graph.graph['component_index']=index
+    return grow_graph(new_graph,census,graph_count+1,metric,params,run_profile(profile,verbose),workers,checkpoint)
+    
+def grow_graph(new_graph,census,graph_count,metric,params,profile,workers,checkpoint):
+# The growth loop of sirg_graph_generator, from iteration graph_count,
+# reporting to the RunProfile profile if one is given
+    node_ceiling,beta,mu,recount=params['node_ceiling'],params['beta'],params['mu'],params['recount']
+    if 'component_index' not in new_graph.graph:
+        index_components(new_graph)     # Isolates and main component, updated as the graph grows
+    writer=None
+    if checkpoint is not None:
+        writer=CheckpointWriter(checkpoint)
+    if isinstance(metric,IncrementalMetric):
+        metric.reset(new_graph)
+    pool=None
+    if workers is not None:
+        pool=CandidatePool(new_graph,metric,workers)
+        if profile is not None:
+            profile.count('copies',workers)    # One replica of the graph per worker
+    try:
+        while new_graph.number_of_nodes()<node_ceiling:
+            if profile is not None:
+                profile.begin(graph_count)
+            if recount is not None and graph_count % recount<1:
+                census.recount(new_graph,exact=True)
+                if profile is not None:
+                    profile.mark('recount')
+            prior_iso_dist=census.distribution() # Get prior probability dist of sub-isomorphs
+            if profile is not None:
+                profile.mark('prior')
+            new_graph=simulate_growth(new_graph,prior_iso_dist,metric,beta,mu,pool,profile)
+            census.update(new_graph,new_graph.graph['added_edges'])
+            new_graph.name="Graph Iteration: "+str(graph_count)
+            if profile is not None:
+                profile.mark('census')
+            if writer is not None and graph_count % params['checkpoint_every']<1:
+                # Save progress every checkpoint_every iterations
+                writer.write(new_graph,graph_count,census,params)
+                if profile is not None:
+                    profile.mark('checkpoint')
+            if profile is not None:
+                profile.end(new_graph,new_graph.graph['component_index'].number_of_components())
+            graph_count+=1
+    finally:
+        if pool is not None:
+            pool.close()
+        if writer is not None:
+            writer.wait()
+    index=new_graph.graph.pop('component_index')
+    new_graph.graph.pop('added_edges',None)
+    if index.number_of_components()>1:
         # Finally, if new_graph has multiple components, conncet them to main component
-        sub_components=connected_component_subgraphs(new_graph)[1:]
-        while len(sub_components)>0:
-            main_component=connected_component_subgraphs(new_graph)[0]
-            mc_nodes=main_component.nodes()
-            rand_mc_node=mc_nodes[random.randint(0,len(mc_nodes))]
-            sub_comp=sub_components.pop()
-            sub_node=sub_comp.nodes()[0]
-            new_graph.add_edge(rand_mc_node,sub_node)
-            if verbose:
-                info(main_component)
-                print 'Number of components:  '+str(len(connected_component_subgraphs(new_graph)))
-                print
+        stitched=stitch_components(new_graph,index)
+        if profile is not None:
+            profile.event('stitch',components=len(stitched)+1)
+    if isinstance(new_graph,CompactGraph):
+        new_graph=new_graph.to_networkx()
     new_graph.name="Final Graph Estimation"
+    if profile is not None:
+        profile.close()
     return new_graph
         
     
-def simulate_growth(G,prior,statistic,iterations,mu):
+def simulate_growth(G,prior,statistic,iterations,mu,pool=None,profile=None):
 # Generate some fixed number of potential future iterations
-# of G based on draws from S
-    graphs=dict()
-    pd=create_pd(prior)
-    for i in xrange(0,iterations):
-        H=copy.deepcopy(G)
-        draw=draw_structure(random.uniform(low=0.0,high=1.0),pd)
-        H=add_structure(H,draw,mu)
-        try: 
-            graphs[statistic(H)].append(H)
-        except KeyError:
-            graphs[statistic(H)]=list()
-            graphs[statistic(H)].append(H)
-    return maxlikelihood_graph(graphs)
+# of G based on draws from S, and keep the fittest. If statistic 
+# is an IncrementalMetric it must already be reset to G, and is 
+# committed to the chosen candidate. If a CandidatePool is given
+# the candidates are generated and scored by its workers, and the
+# time they take is reported to profile as the phase 'candidates'.
+    if pool is None:
+        best_edges,best_stat,best_state,ties=best_candidate(G,prior,statistic,iterations,mu,profile)
+    else:
+        best_edges,best_stat,best_state,ties=pool.best_candidate(prior,iterations,mu)
+        if profile is not None:
+            profile.count('candidates',iterations)
+            profile.mark('candidates')
+        pool.commit(best_edges,best_state)
+    G.graph['added_edges']=commit_edges(G,best_edges)[1]
+    if isinstance(statistic,IncrementalMetric):
+        statistic.commit(best_state)
+    if profile is not None:
+        profile.mark('selection')
+    return G
+    
+def best_candidate(G,prior,statistic,iterations,mu,profile=None):
+# Each candidate is applied to G as an edge delta, scored and rolled
+# back, so G is never copied and only the edges of the fittest 
+# candidate are kept. Ties are broken uniformly at random, as in 
+# maxlikelihood_graph. Returns (edges,statistic,state,ties) for the
+# fittest candidate, where state is the IncrementalMetric state (or None)
+# and ties is the number of candidates that shared its statistic.
+# Generating and scoring the candidates are timed by profile, if given.
+    draws=create_pd(prior).draw(iterations)
+    incremental=isinstance(statistic,IncrementalMetric)
+    best_edges=None
+    best_stat=None
+    best_state=None
+    ties=0
+    for draw in draws:
+        new_edges=struct_edges(*structure_placement(G,draw,mu))
+        if profile is not None:
+            profile.mark('generation')
+        delta=apply_edges(G,new_edges)
+        if incremental:
+            stat,state=statistic.propose(G,delta)
+        else:
+            stat,state=statistic(G),None
+        rollback_edges(G,delta)
+        if profile is not None:
+            profile.mark('scoring')
+            profile.count('candidates')
+        if best_edges is None or stat>best_stat:
+            best_edges,best_stat,best_state,ties=new_edges,stat,state,1
+        elif stat==best_stat:
+            ties+=1
+            if random.randint(0,ties)<1:
+                best_edges,best_state=new_edges,state
+    return best_edges,best_stat,best_state,ties
     
     
 def maxlikelihood_graph(graph_dict):
@@ -92,20 +214,26 @@ def maxlikelihood_graph(graph_dict):
                 
 def add_structure(G,struct,mu):
 # Adds draw from S to G based on decision rule R(.)
+    E,V,nodes_in,mc_node=structure_placement(G,struct,mu)
+    return add_as_struct(G,E,V,nodes_in,mc_node)
+    
+def structure_placement(G,struct,mu):
+# Decides where the draw from S is placed in G by decision rule R(.),
+# without modifying G. Returns the arguments for add_as_struct.
     V=struct.nodes()
     E=struct.edges()
     # 1) Connect any isolates to main component see if G has any isolates
-    isos=find_isolates(G)
-    nodes_in_mc=main_component_nodes(G)
+    index=component_index(G)
+    num_isos=index.number_of_isolates()
     if random.uniform(low=0.0,high=1.0)<=mu:
         # If creating subisomorph from main component nodes, create subgraph 
         # ismorphism of struct from disconnected nodes in the main component
         neighbors=list()
         nodes_in=list()
         while len(nodes_in)!=len(V):
-            rand_mc_node=nodes_in_mc[random.randint(0,len(nodes_in_mc))]    # Select random node in main component
+            rand_mc_node=index.random_main_node()    # Select random node in main component
             while nodes_in.count(rand_mc_node)>0:
-                rand_mc_node=nodes_in_mc[random.randint(0,len(nodes_in_mc))]    # Prevent self-loops
+                rand_mc_node=index.random_main_node()    # Prevent self-loops
             rand_neighbors=G.neighbors(rand_mc_node)
             good_node=True
             for n in neighbors:
@@ -115,42 +243,92 @@ def add_structure(G,struct,mu):
                 nodes_in.append(rand_mc_node)
                 for n in rand_neighbors:
                     neighbors.append(n)
-        mc_node=nodes_in_mc.pop()
-        return add_as_struct(G,E,V,nodes_in,mc_node)
+        mc_node=index.last_main_node()
+        return E,V,nodes_in,mc_node
     else:
-        if len(isos)>0:
+        if num_isos>0:
             # If isolates exist, connect them to main component as struct
-            if len(isos)>=len(E):
-                nodes_in=isos[:len(V)-1]   # Find one-minus isolate nodes to connect to main component as struct
-                mc_node=nodes_in_mc[random.randint(0,len(nodes_in_mc))] # Select random node from main component
-                return add_as_struct(G,E,V,nodes_in,mc_node)
+            if num_isos>=len(E):
+                nodes_in=index.isolates(len(V)-1)   # Find one-minus isolate nodes to connect to main component as struct
+                mc_node=index.random_main_node() # Select random node from main component
+                return E,V,nodes_in,mc_node
             else:
                 # Add remaining isolates
-                nodes_in=isos   # Collect remaining isolate nodes
-                for v in xrange(0,(len(V)-len(isos))-1):
-                    nodes_in.append(nodes_in_mc[random.randint(0,len(nodes_in_mc))]) # Pick random MC nodes to fill out base_nodes
-                mc_node=nodes_in_mc[random.randint(0,len(nodes_in_mc))] # Select random node from main component
-                return add_as_struct(G,E,V,nodes_in,mc_node)
+                nodes_in=index.isolates()   # Collect remaining isolate nodes
+                for v in xrange(0,(len(V)-num_isos)-1):
+                    nodes_in.append(index.random_main_node()) # Pick random MC nodes to fill out base_nodes
+                mc_node=index.random_main_node() # Select random node from main component
+                return E,V,nodes_in,mc_node
         else:
             # Build totally new structure
             nodes_in=range(len(G)+1,(len(G)+1)+(len(V)-1))    # New nodes will begin from 
-            mc_node=nodes_in_mc[random.randint(0,len(nodes_in_mc))] # Select random node from main component
-            return add_as_struct(G,E,V,nodes_in,mc_node)
+            mc_node=index.random_main_node() # Select random node from main component
+            return E,V,nodes_in,mc_node
                     
 def add_as_struct(G,edges,verticies,base_nodes,final_node):
 # Adds the structure reprsented in edges and verticies as 
-# base_nodes and final node to graph G
+# base_nodes and final node to graph G. The edges not already in G
+# are recorded in G.graph['added_edges'] for the motif census
+    new_edges=struct_edges(edges,verticies,base_nodes,final_node)
+    G.graph['added_edges']=commit_edges(G,new_edges)[1]
+    return G
+    
+def struct_edges(edges,verticies,base_nodes,final_node):
+# Returns the edges of the structure reprsented in edges and verticies
+# mirrored onto base_nodes and final_node
     look_up=dict.fromkeys(verticies)
-    # Create a dict to mirror struct edges in selected nodes, then
-    # add new structure to graph G and return
+    # Create a dict to mirror struct edges in selected nodes
     for v in xrange(0,len(verticies)-1):
         look_up[verticies[v]]=base_nodes[v]
     look_up[verticies[-1]]=final_node
     new_edges=list()
     for e in edges:
         new_edges.append((look_up[e[0]],look_up[e[1]]))
-    G.add_edges_from(new_edges)
-    return G
+    return new_edges
+    
+def apply_edges(G,edges):
+# Adds edges to G and returns the delta (added_nodes,added_edges) of
+# the nodes and edges that were not already in G
+    added_nodes=list()
+    added_edges=list()
+    for u,v in edges:
+        for n in (u,v):
+            if n not in G:
+                G.add_node(n)
+                added_nodes.append(n)
+        if not G.has_edge(u,v):
+            G.add_edge(u,v)
+            added_edges.append((u,v))
+    return added_nodes,added_edges
+    
+def commit_edges(G,edges):
+# Permanently adds edges to G, as apply_edges, and records them in G's
+# ComponentIndex if it has one
+    delta=apply_edges(G,edges)
+    index=G.graph.get('component_index')
+    if index is not None:
+        index.add_edges_from(delta[1])
+    return delta
+    
+def component_index(G):
+# Returns the ComponentIndex kept in G.graph['component_index'] by
+# index_components, or a temporary one built from scratch
+    index=G.graph.get('component_index')
+    if index is None:
+        index=ComponentIndex(G)
+    return index
+    
+def index_components(G):
+# Attaches a ComponentIndex to G, which must from then on only be grown
+# through commit_edges (or add_as_struct / simulate_growth)
+    G.graph['component_index']=ComponentIndex(G)
+    return G.graph['component_index']
+    
+def rollback_edges(G,delta):
+# Undoes a delta returned by apply_edges
+    added_nodes,added_edges=delta
+    G.remove_edges_from(added_edges)
+    G.remove_nodes_from(added_nodes)
             
     
 def main_component_nodes(G):
@@ -173,37 +351,61 @@ def is_isolate(G,n):
         return False
 
 def draw_structure(rand_var,prob_dist):
-# Draw some structure from S
-    for interval in prob_dist.keys():
-        if rand_var<interval[0] and rand_var>=interval[1]:
-            struct=prob_dist[interval]
-    return struct
+# Draw some structure from S, given a uniform random variate and the
+# StructureSampler returned by create_pd
+    return prob_dist.lookup(rand_var)
     
 def create_pd(prior_dist):
 # Creates discrete probability distribution over S
-    pd=dict()
-    count=1.0
-    for g in prior_dist.keys():
-        if prior_dist[g]>0.0:
-            interval=count-prior_dist[g]
-            if interval<0.0:
-                interval=0.0
-            pd[(count,interval)]=g
-            count=interval
-    return pd
+    return StructureSampler(prior_dist)
     
-def subgraph_distribution(G,tau=4):
-# Count the number of subgraph isomorphisms for all
-# elements of I in G
-    components=connected_component_subgraphs(G)
-    subgraph_counts=get_subgraphs(tau)
-    for g in components:
-        if g.number_of_nodes()>1:
-            for h in subgraph_counts.keys():
-                GM=GraphMatcher(G,h)
-                for i in GM.subgraph_isomorphisms_iter():
-                    subgraph_counts[h]+=1
-    return subgraph_counts
+class StructureSampler(object):
+# Discrete probability distribution over S, sampled by binary search 
+# on the cumulative distribution. Structures are taken in canonical 
+# order, so the distribution does not depend on where the structure 
+# graphs happen to live in memory (which differs between worker processes)
+    def __init__(self,prior_dist):
+        self.structures=list()
+        probs=list()
+        for g in sorted(prior_dist.keys(),key=graph_canonical_form):
+            if prior_dist[g]>0.0:
+                self.structures.append(g)
+                probs.append(prior_dist[g])
+        if len(self.structures)<1:
+            raise NetworkXError("Prior distribution has no structure with positive probability")
+        self.cumulative=cumsum(probs)
+        self.cumulative/=self.cumulative[-1]
+        
+    def lookup(self,rand_var):
+    # Returns the structure whose interval of the cumulative distribution
+    # contains rand_var
+        i=searchsorted(self.cumulative,rand_var,side='right')
+        return self.structures[min(i,len(self.structures)-1)]
+        
+    def draw(self,n):
+    # Returns a list of n independent draws from S
+        index=searchsorted(self.cumulative,random.random_sample(n),side='right')
+        index=minimum(index,len(self.structures)-1)
+        return [self.structures[i] for i in index]
+    
+def subgraph_distribution(G,tau=4,samples=None,confidence=0.95):
+# Count the number of occurrences of each element of I in G as a 
+# connected induced subgraph. Each occurrence is counted once, and 
+# isomorphic duplicates in I share a single count. If samples is given
+# the counts are estimated from that many random root nodes, and the
+# tuple (estimates,intervals) is returned with a (low,high) confidence
+# interval for each count. The intervals are approximate, and cover the
+# true counts less often than 'confidence' unless samples is large
+# enough for every motif to be found from several roots; rare motifs
+# suffer most (see sample_motif_counts).
+    if samples is None:
+        return motif_counts(G,tau,get_subgraphs(tau).keys())
+    estimates,errors=sample_motif_counts(G,tau,get_subgraphs(tau).keys(),samples,confidence)
+    intervals=dict()
+    for h in estimates.keys():
+        below,above=errors[h]
+        intervals[h]=(max(estimates[h]-below,0.0),estimates[h]+above)
+    return estimates,intervals
         
 def get_counts(components_tup):
     g=components_tup[0]
@@ -225,31 +427,47 @@ def get_subgraphs(tau):
         
 def all_graphs(num_nodes):
 # Retuns a list of all possible single component graphs given
-# some number of nodes
-    graphs=list()
-    n_k=generators.complete_graph(num_nodes)    # Start with complete graph
-    edges=n_k.edges()
-    while n_k.number_of_edges()>0:
-        e=edges.pop()
-        n_k.remove_edge(e[0],e[1])
-        if component.number_connected_components(n_k)==1:
-            graphs.append(copy.deepcopy(n_k))
-    graphs.append(generators.complete_graph(num_nodes))
-    return graphs
+# some number of nodes, one per isomorphism class, from the
+# precomputed motif atlas. The same graph objects are returned
+# on every call, so they must not be modified.
+    return motif_atlas(num_nodes)
     
-def random_deletion(G,num_to_delete=None):
+def random_deletion(G,num_to_delete=None,inplace=True):
 # Returns a NX graph object of G with some number of 
-# nodes and edges randomly deleted,
+# nodes and edges randomly deleted. The nodes to delete are
+# sampled at once, without replacement. By default they are 
+# removed from G itself; if inplace is False G is left alone and
+# the remaining nodes are returned as a new subgraph.
+    nodes=G.nodes()
     if num_to_delete is None:
     # If no nodes to delete has been provided, create a random number
     # that is at least equal to half of the graph
         num_to_delete=random.randint(low=round(len(G)*.5),high=len(G))
-    for i in xrange(0,num_to_delete):
-        current_nodes=G.nodes()
-        # Select a random node index
-        to_delete=random.randint(0,len(current_nodes))
-        # Remove that node
-        G.remove_node(current_nodes[to_delete])
+    victims=random.permutation(len(nodes))[:num_to_delete]
+    if not inplace:
+        keep=ones(len(nodes),dtype=bool)
+        keep[victims]=False
+        H=G.subgraph([nodes[i] for i in flatnonzero(keep)])
+        H.name=G.name
+        return H
+    G.remove_nodes_from([nodes[i] for i in victims])
+    return G
+    
+def random_edge_deletion(G,num_to_delete=None,inplace=True):
+# As random_deletion, but deletes edges, leaving every node of G
+# in place. If no number is given between half and all of the 
+# edges are deleted.
+    edges=G.edges()
+    if num_to_delete is None:
+        num_to_delete=random.randint(low=round(len(edges)*.5),high=len(edges))
+    victims=random.permutation(len(edges))[:num_to_delete]
+    if not inplace:
+    # Copy G whole, with its node and edge data, then delete from the copy
+        H=G.subgraph(G.nodes())
+        H.remove_edges_from([edges[i] for i in victims])
+        H.name=G.name
+        return H
+    G.remove_edges_from([edges[i] for i in victims])
     return G
 
 def main():
@@ -265,7 +483,7 @@ def main():
     write_pajek(base,'test_base.net')
     #print
     info(base)
-    new_graph=sirg_graph_generator(base_graph=G,node_ceiling=200,metric=transitivity,tau=4,beta=100,mu=0.15,verbose=True)
+    new_graph=sirg_graph_generator(base_graph=G,node_ceiling=200,metric=Transitivity(),tau=4,beta=100,mu=0.15,verbose=True)
     new_graph.name='Estiamted Graph'
     print
     info(new_graph)
@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+# encoding: utf-8
+"""
+candidate_pool.py
+
+Parallel candidate generation for the SIRG growth loop.  Each worker
+process holds its own replica of the growing graph (and of the fitness
+metric's state), generates and scores its share of the beta candidates
+with SIRG_dev1.best_candidate, and reports its fittest.  The chosen
+candidate's edges are then broadcast so every replica stays in step.
+
+Created by Drew Conway on 2009-12-02.
+Copyright (c) 2009. All rights reserved.
+"""
+
+import sys
+import os
+from multiprocessing import Process,Pipe,cpu_count
+from numpy import random
+
+
+class CandidatePool(object):
+# A fixed set of worker processes growing replicas of G. Workers are
+# reseeded from numpy.random with every request for candidates, so for a
+# given seed and number of workers the candidates generated are
+# reproducible, and a run resumed from a checkpoint of numpy.random's
+# state generates the same candidates as one that was never stopped.
+    def __init__(self,G,statistic,workers=None):
+        if workers is None:
+            workers=cpu_count()
+        self.connections=list()
+        self.processes=list()
+        for i in xrange(workers):
+            parent,child=Pipe()
+            p=Process(target=candidate_worker,args=(child,G,statistic))
+            p.daemon=True
+            p.start()
+            child.close()
+            self.connections.append(parent)
+            self.processes.append(p)
+
+    def best_candidate(self,prior,iterations,mu):
+    # Splits the iterations across the workers and returns the fittest
+    # candidate as (edges,statistic,state,ties), breaking ties between
+    # workers in proportion to their own tie counts so that the choice
+    # is uniform over all tied candidates
+        workers=len(self.connections)
+        seeds=random.randint(0,2**31-1,workers)
+        busy=list()
+        for i in xrange(workers):
+            share=iterations/workers+(i<iterations%workers)
+            if share>0:
+                self.connections[i].send(('score',prior,share,mu,seeds[i]))
+                busy.append(self.connections[i])
+        results=[c.recv() for c in busy]
+        best_stat=max(r[1] for r in results)
+        tied=[r for r in results if r[1]==best_stat]
+        ties=sum(r[3] for r in tied)
+        pick=random.randint(0,ties)
+        for r in tied:
+            if pick<r[3]:
+                return r[0],r[1],r[2],ties
+            pick-=r[3]
+
+    def commit(self,edges,state):
+    # Adds the chosen candidate's edges to every replica
+        for c in self.connections:
+            c.send(('commit',edges,state))
+
+    def close(self):
+    # Stops the workers
+        for c in self.connections:
+            c.send(('stop',))
+            c.close()
+        for p in self.processes:
+            p.join()
+        self.connections=list()
+        self.processes=list()
+
+
+def candidate_worker(conn,G,statistic):
+# Worker loop for CandidatePool, serving 'score', 'commit' and 'stop'
+# requests on the pipe conn
+    from SIRG_dev1 import best_candidate,commit_edges
+    from fitness import IncrementalMetric
+    incremental=isinstance(statistic,IncrementalMetric)
+    if incremental:
+        statistic.reset(G)
+    while True:
+        request=conn.recv()
+        if request[0]=='score':
+            prior,iterations,mu,seed=request[1:]
+            random.seed(seed)
+            conn.send(best_candidate(G,prior,statistic,iterations,mu))
+        elif request[0]=='commit':
+            edges,state=request[1:]
+            commit_edges(G,edges)
+            if incremental:
+                statistic.commit(state)
+        else:
+            break
+    conn.close()
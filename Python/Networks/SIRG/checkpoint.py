@@ -0,0 +1,199 @@
+#!/usr/bin/env python
+# encoding: utf-8
+"""
+checkpoint.py
+
+Binary checkpoints for long SIRG runs.  A checkpoint is a NumPy .npz
+archive holding the graph as a node array plus an edge index array (and
+for a CompactGraph, the original labels of its nodes), the state of its
+component index, the numpy.random state, the iteration
+count, the motif census and the run parameters, so a run can be resumed
+without recounting anything and continues exactly as it would have done
+uninterrupted.
+Checkpoints are written by a background thread, to a temporary file
+that is then renamed over the previous checkpoint.
+
+Created by Drew Conway on 2009-12-15.
+Copyright (c) 2009. All rights reserved.
+"""
+
+import sys
+import os
+import json
+import threading
+from networkx import *
+from numpy import random,array,empty,load,savez
+
+
+class CheckpointWriter(object):
+# Writes checkpoints to 'path' off the main loop.  Only one write is in
+# flight at a time; a new checkpoint waits for the previous one.
+    def __init__(self,path):
+        self.path=path
+        self.thread=None
+
+    def write(self,G,iteration,census,params):
+    # Snapshots the run state now and writes it in the background
+        arrays=checkpoint_arrays(G,iteration,census,params)
+        self.wait()
+        self.thread=threading.Thread(target=write_arrays,args=(self.path,arrays))
+        self.thread.daemon=True
+        self.thread.start()
+
+    def wait(self):
+    # Blocks until the last checkpoint is on disk
+        if self.thread is not None:
+            self.thread.join()
+            self.thread=None
+
+
+def checkpoint_arrays(G,iteration,census,params):
+# Returns a dict of the arrays making up a checkpoint of the run state
+    nodes,edges=graph_arrays(G)
+    forms=census.classes.keys()
+    name,keys,pos,has_gauss,cached_gaussian=random.get_state()[:5]
+    arrays=index_arrays(G.graph.get('component_index'),nodes.tolist())
+    arrays.update(label_arrays(getattr(G,'labels',None),nodes.tolist()))
+    arrays.update(nodes=nodes,
+                  edges=edges,
+                  iteration=array(iteration),
+                  motif_sizes=array([f[0] for f in forms],dtype='int64'),
+                  motif_masks=array([f[1] for f in forms],dtype='int64'),
+                  motif_counts=array([census.counts[census.classes[f]] for f in forms],dtype='float64'),
+                  motif_errors=array([census.errors[census.classes[f]] for f in forms],dtype='float64').reshape(-1,2),
+                  rng_keys=array(keys),
+                  rng_pos=array(pos),
+                  rng_gauss=array([has_gauss,cached_gaussian],dtype='float64'),
+                  params=array(json.dumps(params)))
+    return arrays
+
+
+def index_arrays(index,nodes):
+# Returns a dict of the arrays holding the state of the ComponentIndex
+# index, as indices into nodes: component_members, the members of every
+# component in index order, component_sizes, the length of each run of
+# component_members, component_main, the position of the main component,
+# and isolates, in index order. Empty if index is None.
+    if index is None:
+        return dict()
+    position=dict((n,i) for i,n in enumerate(nodes))
+    roots=index.members.keys()
+    return dict(component_members=array([position[n] for r in roots for n in index.members[r]],dtype='int64'),
+                component_sizes=array([len(index.members[r]) for r in roots],dtype='int64'),
+                component_main=array(roots.index(index.main)),
+                isolates=array([position[n] for n in index.isolate_list],dtype='int64'))
+
+
+def label_arrays(labels,nodes):
+# Returns a dict of the arrays holding a CompactGraph's labels dict, as
+# labelled, the indices into nodes of the relabelled nodes, and labels,
+# their original labels. Empty if there are no labels.
+    if not labels:
+        return dict()
+    position=dict((n,i) for i,n in enumerate(nodes))
+    labelled=[n for n in labels if n in position]
+    return dict(labelled=array([position[n] for n in labelled],dtype='int64'),
+                labels=node_array([labels[n] for n in labelled]))
+
+
+def arrays_index(data,nodes):
+# Returns the ComponentIndex saved by index_arrays in data, over the
+# node list nodes
+    from components import ComponentIndex
+    members=[nodes[i] for i in data['component_members']]
+    components=list()
+    start=0
+    for size in data['component_sizes']:
+        components.append(members[start:start+size])
+        start+=size
+    main=components[int(data['component_main'])][0]
+    return ComponentIndex.from_components(components,[nodes[i] for i in data['isolates']],main)
+
+
+def graph_arrays(G):
+# Returns the arrays (nodes,edges) for G, where edges holds each edge as
+# a pair of indices into nodes
+    nodes=G.nodes()
+    index=dict((n,i) for i,n in enumerate(nodes))
+    edges=empty((G.number_of_edges(),2),dtype='int64')
+    for i,(u,v) in enumerate(G.edges_iter()):
+        edges[i,0]=index[u]
+        edges[i,1]=index[v]
+    return node_array(nodes),edges
+
+
+def arrays_graph(nodes,edges):
+# Returns the Graph described by the arrays from graph_arrays
+    G=Graph()
+    nodes=nodes.tolist()
+    G.add_nodes_from(nodes)
+    G.add_edges_from((nodes[u],nodes[v]) for u,v in edges)
+    return G
+
+
+def save_graph(G,path):
+# Writes G to path as an .npz archive of its node and edge arrays
+    nodes,edges=graph_arrays(G)
+    write_arrays(path,dict(nodes=nodes,edges=edges,name=array(G.name)))
+
+
+def load_graph(path):
+# Reads a graph written by save_graph
+    data=load(path,allow_pickle=True)
+    G=arrays_graph(data['nodes'],data['edges'])
+    G.name=str(data['name'])
+    return G
+
+
+def node_array(nodes):
+# Returns nodes as an integer or string array if they are all of that
+# type, otherwise as an object array
+    if all(isinstance(n,(int,long)) for n in nodes):
+        return array(nodes,dtype='int64')
+    if all(isinstance(n,basestring) for n in nodes):
+        return array(nodes)
+    return array(nodes,dtype=object)
+
+
+def write_arrays(path,arrays):
+# Writes arrays to path as an .npz archive, atomically
+    tmp=path+'.tmp'
+    f=open(tmp,'wb')
+    try:
+        savez(f,**arrays)
+    finally:
+        f.close()
+    os.rename(tmp,path)
+
+
+def load_checkpoint(path,motifs=None):
+# Loads a checkpoint written by CheckpointWriter and restores the
+# numpy.random state. Returns (G,iteration,census,params), where census
+# is a MotifCensus over 'motifs' (by default get_subgraphs(tau)) holding
+# the saved counts, and G carries its saved ComponentIndex in
+# G.graph['component_index'] and, for a compact run, the original labels
+# of its nodes (CompactGraph.labels) in G.graph['labels'].
+    from motif_census import MotifCensus
+    data=load(path,allow_pickle=True)
+    params=json.loads(str(data['params']))
+    G=arrays_graph(data['nodes'],data['edges'])
+    nodes=data['nodes'].tolist()
+    if 'component_members' in data:
+        G.graph['component_index']=arrays_index(data,nodes)
+    if 'labels' in data:
+        G.graph['labels']=dict((nodes[i],l) for i,l in zip(data['labelled'],data['labels'].tolist()))
+    iteration=int(data['iteration'])
+    G.name="Graph Iteration: "+str(iteration)
+    counts=dict()
+    errors=dict()
+    motif_errors=data['motif_errors']
+    if motif_errors.ndim==1:
+        # Older checkpoints hold symmetric half widths
+        motif_errors=motif_errors.repeat(2).reshape(-1,2)
+    for k,mask,c,e in zip(data['motif_sizes'],data['motif_masks'],data['motif_counts'],motif_errors):
+        counts[(int(k),int(mask))]=c
+        errors[(int(k),int(mask))]=tuple(e)
+    census=MotifCensus(G,params['tau'],motifs,params['samples'],params['confidence'],counts=counts,errors=errors)
+    has_gauss,cached_gaussian=data['rng_gauss']
+    random.set_state(('MT19937',data['rng_keys'],int(data['rng_pos']),int(has_gauss),float(cached_gaussian)))
+    return G,iteration,census,params
@@ -0,0 +1,257 @@
+#!/usr/bin/env python
+# encoding: utf-8
+"""
+compact_graph.py
+
+An array-backed undirected graph for growing very large SIRG estimates.
+NetworkX keeps a dict entry per neighbour and an attribute dict per
+edge, several hundred bytes per edge; CompactGraph keeps each node's
+neighbours in a typed array, eight bytes per neighbour, indexed by
+integer node label.  It implements the part of the NetworkX Graph
+interface the SIRG pipeline uses (add_structure, add_as_struct, the
+motif census, fitness.py and the component index), and converts to and
+from NetworkX graphs and CSR arrays at the boundaries.
+
+Each neighbour array is kept sorted, so for a node of degree d:
+has_edge, degree and membership tests on G[v] ('w in G[v]') take
+O(log d) by binary search; add_edge and remove_edge take O(log d) to
+find the position plus an O(d) shift of the array's tail (a single
+memmove); iterating over G[v] takes O(d).  NetworkX's dict adjacency
+answers membership in O(1) expected time, so CompactGraph trades a
+logarithmic factor at high-degree nodes for its memory saving.
+
+Nodes must be non-negative integers, and adj holds a slot for every
+label up to the largest; from_networkx relabels any graph whose nodes
+are not dense non-negative integers and to_networkx restores the
+original labels.  Edge attributes are not kept.  NetworkX algorithms
+that reach into G.adj (such as networkx.transitivity) need a NetworkX
+graph, so use the metrics in fitness.py with a CompactGraph.
+
+Created by Drew Conway on 2010-01-19.
+Copyright (c) 2010. All rights reserved.
+"""
+
+import sys
+import os
+from array import array
+from bisect import bisect_left
+from networkx import Graph,NetworkXError
+from numpy import zeros,cumsum,concatenate,asarray
+
+
+class CompactGraph(object):
+    def __init__(self,data=None,name=''):
+        self.adj=list()         # node -> array of neighbours, or None
+        self.node_count=0
+        self.edge_count=0
+        self.labels=dict()      # node -> original label, from from_networkx
+        self.graph=dict()
+        self.name=name
+        if data is not None:
+            self.add_edges_from(data)
+
+    @classmethod
+    def from_networkx(cls,G,labels=None):
+    # Returns a CompactGraph copy of the NetworkX graph G. Nodes are
+    # relabelled 0..n-1 unless they are already dense non-negative
+    # integers (all below 2n), as adj holds a slot for every label up to
+    # the largest. If labels is given, G's nodes are kept as they are
+    # and labels is taken as their original labels, for a graph copied
+    # out of a CompactGraph (e.g. a checkpoint).
+        H=cls(name=G.name)
+        nodes=G.nodes()
+        if labels is not None:
+            index=dict((n,n) for n in nodes)
+            H.labels=dict(labels)
+        elif all(isinstance(n,(int,long)) and 0<=n<2*len(nodes) for n in nodes):
+            index=dict((n,n) for n in nodes)
+        else:
+            index=dict((n,i) for i,n in enumerate(nodes))
+            H.labels=dict((i,n) for n,i in index.items())
+        H.add_nodes_from(index.values())
+        H.add_edges_from((index[u],index[v]) for u,v in G.edges_iter())
+        return H
+
+    def to_networkx(self):
+    # Returns a NetworkX Graph copy of this graph, with original labels.
+    # Nodes added since from_networkx keep their own labels, unless one
+    # is an original label of another node, when they are given new
+    # integers above every label in use.
+        G=Graph(name=self.name)
+        label=dict(self.labels)
+        taken=set(label.itervalues())
+        fresh=max([n for n in taken if isinstance(n,(int,long))]+[len(self.adj)])+1
+        for n in self:
+            if n not in label:
+                if n in taken:
+                    label[n]=fresh
+                    fresh+=1
+                else:
+                    label[n]=n
+        G.add_nodes_from(label[n] for n in self)
+        G.add_edges_from((label[u],label[v]) for u,v in self.edges_iter())
+        return G
+
+    def to_csr(self):
+    # Returns (nodes,indptr,indices) NumPy arrays, where the neighbours of
+    # nodes[i] are indices[indptr[i]:indptr[i+1]] (as node labels)
+        nodes=asarray(self.nodes(),dtype='int64')
+        indptr=zeros(len(nodes)+1,dtype='int64')
+        indptr[1:]=cumsum([len(self.adj[n]) for n in nodes])
+        if len(nodes)>0:
+            indices=concatenate([asarray(self.adj[n],dtype='int64') for n in nodes])
+        else:
+            indices=zeros(0,dtype='int64')
+        return nodes,indptr,indices
+
+    def __len__(self):
+        return self.node_count
+
+    def __iter__(self):
+        for n,nbrs in enumerate(self.adj):
+            if nbrs is not None:
+                yield n
+
+    def __contains__(self,n):
+        try:
+            return n>=0 and self.adj[n] is not None
+        except (IndexError,TypeError):
+            return False
+
+    def __getitem__(self,n):
+    # Returns the sorted neighbour array of n; supports 'in' (by binary
+    # search), len and iteration
+        if n not in self:
+            raise NetworkXError("node %s not in graph"%(n,))
+        return self.adj[n]
+
+    def is_directed(self):
+        return False
+
+    def is_multigraph(self):
+        return False
+
+    def nodes(self):
+        return list(self)
+
+    def nodes_iter(self):
+        return iter(self)
+
+    def number_of_nodes(self):
+        return self.node_count
+
+    order=number_of_nodes
+
+    def number_of_edges(self):
+        return self.edge_count
+
+    size=number_of_edges
+
+    def neighbors(self,n):
+        return list(self[n])
+
+    def degree(self,nbunch=None):
+    # Degree of a node, or a list of degrees for all nodes (or nbunch).
+    # As in NetworkX a self-loop adds two to the degree.
+        if nbunch in self:
+            nbrs=self.adj[nbunch]
+            return len(nbrs)+(nbunch in nbrs)
+        if nbunch is None:
+            nbunch=self
+        return [self.degree(n) for n in nbunch]
+
+    def degrees(self):
+    # Returns a NumPy array of degree by node label (zero for absent labels)
+        d=zeros(len(self.adj),dtype='int64')
+        for n in self:
+            d[n]=len(self.adj[n])+(n in self.adj[n])
+        return d
+
+    def edges(self):
+        return list(self.edges_iter())
+
+    def edges_iter(self):
+        for u in self:
+            for v in self.adj[u]:
+                if u<=v:
+                    yield (u,v)
+
+    def has_node(self,n):
+        return n in self
+
+    def has_edge(self,u,v):
+        return u in self and v in self.adj[u]
+
+    def add_node(self,n):
+        if not isinstance(n,(int,long)) or n<0:
+            raise NetworkXError("CompactGraph nodes must be non-negative integers, not %s"%(n,))
+        if n>=len(self.adj):
+            self.adj.extend([None]*(n+1-len(self.adj)))
+        if self.adj[n] is None:
+            self.adj[n]=NeighbourArray('l')
+            self.node_count+=1
+
+    def add_nodes_from(self,nodes):
+        for n in nodes:
+            self.add_node(n)
+
+    def add_edge(self,u,v):
+        self.add_node(u)
+        self.add_node(v)
+        if self.adj[u].add(v):
+            if u!=v:
+                self.adj[v].add(u)
+            self.edge_count+=1
+
+    def add_edges_from(self,edges):
+        for e in edges:
+            self.add_edge(e[0],e[1])
+
+    def remove_edge(self,u,v):
+        if not self.has_edge(u,v):
+            raise NetworkXError("The edge %s-%s is not in the graph"%(u,v))
+        self.adj[u].discard(v)
+        if u!=v:
+            self.adj[v].discard(u)
+        self.edge_count-=1
+
+    def remove_edges_from(self,edges):
+        for e in edges:
+            if self.has_edge(e[0],e[1]):
+                self.remove_edge(e[0],e[1])
+
+    def remove_node(self,n):
+        if n not in self:
+            raise NetworkXError("The node %s is not in the graph"%(n,))
+        for v in list(self.adj[n]):
+            self.remove_edge(n,v)
+        self.adj[n]=None
+        self.node_count-=1
+        while len(self.adj)>0 and self.adj[-1] is None:
+            self.adj.pop()
+
+    def remove_nodes_from(self,nodes):
+        for n in nodes:
+            if n in self:
+                self.remove_node(n)
+
+
+class NeighbourArray(array):
+# A sorted array of node labels, searched by bisection
+    def __contains__(self,n):
+        i=bisect_left(self,n)
+        return i<len(self) and self[i]==n
+
+    def add(self,n):
+    # Inserts n in order, returning False if it was already present
+        i=bisect_left(self,n)
+        if i<len(self) and self[i]==n:
+            return False
+        self.insert(i,n)
+        return True
+
+    def discard(self,n):
+    # Removes n, if present
+        i=bisect_left(self,n)
+        if i<len(self) and self[i]==n:
+            self.pop(i)
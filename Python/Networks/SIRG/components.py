@@ -0,0 +1,160 @@
+#!/usr/bin/env python
+# encoding: utf-8
+"""
+components.py
+
+Disjoint-set (union-find) index of the connected components of a graph
+that only grows.  Answers which nodes are isolates, whether a node is in
+the main (largest) component and picks random main component nodes in
+O(1) or amortized O(alpha(n)) time, rather than by scanning the graph.
+Also provides stitch_components, for any generator that needs to join
+a graph's components into one.
+
+Created by Drew Conway on 2009-12-08.
+Copyright (c) 2009. All rights reserved.
+"""
+
+import sys
+import os
+from numpy import random
+
+
+class ComponentIndex(object):
+# Union-find over the nodes of G.  The index must be told about every
+# node and edge added to G afterwards (add_node, add_edge); it does not
+# support removals.
+    def __init__(self,G=None):
+        self.parent=dict()
+        self.members=dict()     # root -> list of nodes in its component
+        self.isolate_list=list()
+        self.isolate_pos=dict() # isolate -> position in isolate_list
+        self.main=None          # root of the largest component
+        if G is not None:
+            for n in G.nodes():
+                self.add_node(n)
+                if len(G[n])>0:
+                    self._discard_isolate(n)
+            for u,v in G.edges():
+                self.union(u,v)
+
+    @classmethod
+    def from_components(cls,components,isolates,main):
+    # Rebuilds an index from its state: components, a list of each
+    # component's members in the order members holds them (root first),
+    # the isolates in order and the root of the main component. The
+    # result answers every query, random_main_node included, exactly as
+    # the index the state was taken from.
+        index=cls()
+        for nodes in components:
+            root=nodes[0]
+            for n in nodes:
+                index.parent[n]=root
+            index.members[root]=list(nodes)
+        index.isolate_list=list(isolates)
+        index.isolate_pos=dict((n,i) for i,n in enumerate(index.isolate_list))
+        index.main=main
+        return index
+
+    def __contains__(self,n):
+        return n in self.parent
+
+    def find(self,n):
+    # Returns the root of n's component, halving the path as it goes
+        parent=self.parent
+        while parent[n]!=n:
+            parent[n]=parent[parent[n]]
+            n=parent[n]
+        return n
+
+    def add_node(self,n):
+    # Adds n as an isolate, if it is not already indexed
+        if n not in self.parent:
+            self.parent[n]=n
+            self.members[n]=[n]
+            self.isolate_pos[n]=len(self.isolate_list)
+            self.isolate_list.append(n)
+            if self.main is None:
+                self.main=n
+
+    def add_edge(self,u,v):
+    # Records the edge (u,v), adding either node if needed
+        self.add_node(u)
+        self.add_node(v)
+        self._discard_isolate(u)
+        self._discard_isolate(v)
+        self.union(u,v)
+
+    def add_edges_from(self,edges):
+        for u,v in edges:
+            self.add_edge(u,v)
+
+    def union(self,u,v):
+    # Merges the components of u and v, smaller into larger
+        ru,rv=self.find(u),self.find(v)
+        if ru==rv:
+            return ru
+        if len(self.members[ru])<len(self.members[rv]):
+            ru,rv=rv,ru
+        self.parent[rv]=ru
+        self.members[ru].extend(self.members.pop(rv))
+        if self.main==rv or len(self.members[ru])>len(self.members[self.main]):
+            self.main=ru
+        return ru
+
+    def isolates(self,k=None):
+    # Returns a list of the isolates, or of the first k of them
+        return self.isolate_list[:k]
+
+    def number_of_isolates(self):
+        return len(self.isolate_list)
+
+    def number_of_components(self):
+        return len(self.members)
+
+    def in_main_component(self,n):
+        return self.find(n)==self.main
+
+    def main_component_nodes(self):
+    # Returns a list of the nodes in the main component
+        return list(self.members[self.main])
+
+    def main_component_size(self):
+        return len(self.members[self.main])
+
+    def random_main_node(self):
+    # Returns a node of the main component chosen uniformly at random
+        nodes=self.members[self.main]
+        return nodes[random.randint(0,len(nodes))]
+
+    def last_main_node(self):
+    # Returns the most recently merged node of the main component
+        return self.members[self.main][-1]
+
+    def _discard_isolate(self,n):
+    # Removes n from the isolates by swapping in the last isolate
+        pos=self.isolate_pos.pop(n,None)
+        if pos is not None:
+            last=self.isolate_list.pop()
+            if last!=n:
+                self.isolate_list[pos]=last
+                self.isolate_pos[last]=pos
+
+
+def stitch_components(G,index=None):
+# Connects every component of G other than the main component to it,
+# by an edge from the component's first node to a random node of the
+# (growing) main component.  The components are found once, from index
+# if given (it is kept up to date), and merged by union-find.  Returns
+# the list of edges added. Components are taken in order of their roots,
+# so the result does not depend on how the index was built.
+    if index is None:
+        index=ComponentIndex(G)
+    added=list()
+    for root in sorted(index.members.keys()):
+        if root!=index.main:
+            sub_node=index.members[root][0]
+            main_node=index.random_main_node()
+            G.add_edge(main_node,sub_node)
+            index.add_edge(main_node,sub_node)
+            added.append((main_node,sub_node))
+    return added
@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+# encoding: utf-8
+"""
+ensemble.py
+
+Generates many independent SIRG estimates of the same base graph, e.g.
+to build confidence bands for graph statistics.  The motif census of
+the base graph is computed once and shared with every replicate, the
+replicates run across a pool of processes, and each finished estimate
+is written to disk (with its summary statistics) as soon as it is done
+rather than being held in memory.
+
+Created by Drew Conway on 2010-01-11.
+Copyright (c) 2010. All rights reserved.
+"""
+
+import sys
+import os
+import copy
+import json
+from multiprocessing import Pool,cpu_count
+from networkx import *
+from numpy import random
+from SIRG_dev1 import grow_graph
+from motif_census import MotifCensus
+from checkpoint import save_graph
+from fitness import Transitivity,AverageClustering
+
+_shared=dict()  # Base graph, census and parameters for the worker processes
+
+
+def sirg_ensemble(base_graph,node_ceiling,metric,replicates,output_dir=None,summary=None,processes=None,tau=4,beta=100,mu=0.15,samples=None,recount=None):
+# Runs 'replicates' independent sirg_graph_generator estimates from
+# base_graph on 'processes' worker processes (default, one per CPU).
+# Each replicate is seeded from numpy.random, so an ensemble is
+# reproducible for a given numpy.random.seed.  If output_dir is given,
+# replicate i is saved there as estimate_i.npz (see checkpoint.load_graph)
+# and its summary is appended to summary.jsonl as it finishes.  summary
+# is a function from a graph to a dict of statistics, by default
+# summary_statistics.  Returns the list of summaries in replicate order.
+    if summary is None:
+        summary=summary_statistics
+    if processes is None:
+        processes=cpu_count()
+    census=MotifCensus(base_graph,tau,samples=samples)
+    params=dict(node_ceiling=node_ceiling,tau=tau,beta=beta,mu=mu,samples=samples,confidence=census.confidence,recount=recount,checkpoint_every=None)
+    _shared.update(base_graph=base_graph,census=census,metric=metric,params=params,output_dir=output_dir,summary=summary)
+    jobs=zip(xrange(replicates),random.randint(0,2**31-1,replicates))
+    summaries=[None]*replicates
+    out=None
+    if output_dir is not None:
+        if not os.path.isdir(output_dir):
+            os.makedirs(output_dir)
+        out=open(os.path.join(output_dir,'summary.jsonl'),'w')
+    try:
+        if processes>1:
+            pool=Pool(processes)
+            results=pool.imap_unordered(run_replicate,jobs)
+        else:
+            pool=None
+            results=(run_replicate(j) for j in jobs)
+        for i,stats in results:
+            summaries[i]=stats
+            if out is not None:
+                out.write(json.dumps(stats)+'\n')
+                out.flush()
+        if pool is not None:
+            pool.close()
+            pool.join()
+    finally:
+        if out is not None:
+            out.close()
+        _shared.clear()
+    return summaries
+
+
+def run_replicate(job):
+# Grows one replicate from the shared base graph and census, saving it
+# if an output directory was given. Returns (replicate,summary).
+    i,seed=job
+    random.seed(seed)
+    G=copy.deepcopy(_shared['base_graph'])
+    census=copy.deepcopy(_shared['census'])
+    metric=_shared['metric']
+    if hasattr(metric,'reset'):
+        metric=copy.deepcopy(metric)
+    G=grow_graph(G,census,1,metric,_shared['params'],None,None,None)
+    G.name="Ensemble Estimate "+str(i)
+    if _shared['output_dir'] is not None:
+        save_graph(G,os.path.join(_shared['output_dir'],'estimate_'+str(i)+'.npz'))
+    stats=_shared['summary'](G)
+    stats['replicate']=i
+    stats['seed']=int(seed)
+    return i,stats
+
+
+def summary_statistics(G):
+# Default ensemble summary: size and clustering of an estimate
+    return dict(nodes=G.number_of_nodes(),
+                edges=G.number_of_edges(),
+                components=number_connected_components(G),
+                transitivity=Transitivity()(G),
+                average_clustering=AverageClustering()(G))
@@ -0,0 +1,250 @@
+#!/usr/bin/env python
+# encoding: utf-8
+"""
+fitness.py
+
+Incremental structural fitness metrics for scoring SIRG candidates.
+Each metric keeps a small summary of the current graph, so the fitness
+of a candidate that adds k edges is found from the neighbourhoods of
+those edges, O(k*d), rather than by recomputing the whole graph.
+
+A metric is used in three steps:
+    reset(G)            summarise G from scratch
+    propose(G,delta)    with the delta (added_nodes,added_edges) from
+                        SIRG_dev1.apply_edges already in G, return the
+                        tuple (value,state) for the candidate
+    commit(state)       adopt the state of the chosen candidate
+Calling a metric on a graph, e.g. Transitivity()(G), computes it from
+scratch so metrics can also be passed anywhere a plain statistic is.
+
+As in the NetworkX clustering functions, self-loops are ignored.
+
+Created by Drew Conway on 2009-11-20.
+Copyright (c) 2009. All rights reserved.
+"""
+
+import sys
+import os
+from networkx import *
+
+__all__=['IncrementalMetric','Transitivity','AverageClustering','DegreeAssortativity','EdgeDensity']
+
+
+class IncrementalMetric(object):
+# Base class for delta-aware fitness metrics
+    def __init__(self):
+        self.value=None
+
+    def __call__(self,G):
+    # Compute the metric for G from scratch, leaving this metric's state alone
+        m=self.__class__()
+        m.reset(G)
+        return m.value
+
+    def reset(self,G):
+        raise NotImplementedError
+
+    def propose(self,G,delta):
+        raise NotImplementedError
+
+    def commit(self,state):
+        raise NotImplementedError
+
+
+class Transitivity(IncrementalMetric):
+# Fraction of connected triples that are closed, 3*triangles/triads,
+# as in networkx.transitivity
+    def reset(self,G):
+        self.triangles=0    # 6 times number of triangles
+        self.contri=0       # 2 times number of connected triples
+        for v,d,t in triangles_and_degrees(G):
+            self.triangles+=t
+            self.contri+=d*(d-1)
+        self.value=self._value(self.triangles,self.contri)
+
+    def propose(self,G,delta):
+        edges=loopless(delta[1])
+        triangles=self.triangles+6*len(new_triangles(G,edges))
+        contri=self.contri
+        for v,k in degree_changes(edges).items():
+            d=degree(G,v)
+            contri+=d*(d-1)-(d-k)*(d-k-1)
+        return self._value(triangles,contri),(triangles,contri)
+
+    def commit(self,state):
+        self.triangles,self.contri=state
+        self.value=self._value(self.triangles,self.contri)
+
+    def _value(self,triangles,contri):
+        if triangles==0:
+            return 0.0
+        return triangles/float(contri)
+
+
+class AverageClustering(IncrementalMetric):
+# Mean of the node clustering coefficients, as in
+# networkx.average_clustering
+    def reset(self,G):
+        self.node_triangles=dict()
+        self.total=0.0
+        for v,d,t in triangles_and_degrees(G):
+            self.node_triangles[v]=t/2
+            self.total+=clustering_coefficient(t/2,d)
+        self.order=G.number_of_nodes()
+        self.value=self._value(self.total,self.order)
+
+    def propose(self,G,delta):
+        edges=loopless(delta[1])
+        changes=degree_changes(edges)
+        tri_changes=dict()
+        for tri in new_triangles(G,edges):
+            for v in tri:
+                tri_changes[v]=tri_changes.get(v,0)+1
+        total=self.total
+        node_triangles=dict()
+        for v in set(changes.keys()).union(tri_changes.keys()):
+            d=degree(G,v)
+            old_t=self.node_triangles.get(v,0)
+            new_t=old_t+tri_changes.get(v,0)
+            total+=clustering_coefficient(new_t,d)-clustering_coefficient(old_t,d-changes.get(v,0))
+            node_triangles[v]=new_t
+        order=self.order+len(delta[0])
+        return self._value(total,order),(total,order,node_triangles)
+
+    def commit(self,state):
+        self.total,self.order,node_triangles=state
+        self.node_triangles.update(node_triangles)
+        self.value=self._value(self.total,self.order)
+
+    def _value(self,total,order):
+        if order==0:
+            return 0.0
+        return total/float(order)
+
+
+class DegreeAssortativity(IncrementalMetric):
+# Newman's degree assortativity coefficient r, the Pearson correlation
+# of the degrees at either end of an edge
+    def reset(self,G):
+        self.edges=0
+        self.prod=0.0   # sum over edges of j*k
+        self.sum=0.0    # sum over edges of j+k
+        self.sq=0.0     # sum over edges of j^2+k^2
+        for u,v in G.edges():
+            if u!=v:
+                j,k=degree(G,u),degree(G,v)
+                self.edges+=1
+                self.prod+=j*k
+                self.sum+=j+k
+                self.sq+=j*j+k*k
+        self.value=self._value(self.edges,self.prod,self.sum,self.sq)
+
+    def propose(self,G,delta):
+        edges=loopless(delta[1])
+        changes=degree_changes(edges)
+        added=set(frozenset(e) for e in edges)
+        m,prod,sums,sq=self.edges+len(added),self.prod,self.sum,self.sq
+        seen=set()
+        for u in changes.keys():
+            for v in G[u]:
+                e=frozenset((u,v))
+                if u==v or e in seen:
+                    continue
+                seen.add(e)
+                j,k=degree(G,u),degree(G,v)
+                prod+=j*k
+                sums+=j+k
+                sq+=j*j+k*k
+                if e not in added:
+                    # Remove the edge's contribution under the old degrees
+                    j-=changes[u]
+                    k-=changes.get(v,0)
+                    prod-=j*k
+                    sums-=j+k
+                    sq-=j*j+k*k
+        return self._value(m,prod,sums,sq),(m,prod,sums,sq)
+
+    def commit(self,state):
+        self.edges,self.prod,self.sum,self.sq=state
+        self.value=self._value(self.edges,self.prod,self.sum,self.sq)
+
+    def _value(self,m,prod,sums,sq):
+        if m==0:
+            return 0.0
+        mean=sums/(2.0*m)
+        var=sq/(2.0*m)-mean*mean
+        if var<=0:
+            return 0.0
+        return (prod/m-mean*mean)/var
+
+
+class EdgeDensity(IncrementalMetric):
+# Fraction of possible edges present, as in networkx.density
+    def reset(self,G):
+        self.order=G.number_of_nodes()
+        self.size=G.number_of_edges()
+        self.value=self._value(self.order,self.size)
+
+    def propose(self,G,delta):
+        order=self.order+len(delta[0])
+        size=self.size+len(delta[1])
+        return self._value(order,size),(order,size)
+
+    def commit(self,state):
+        self.order,self.size=state
+        self.value=self._value(self.order,self.size)
+
+    def _value(self,order,size):
+        if size==0:
+            return 0.0
+        return size*2.0/float(order*(order-1))
+
+
+def triangles_and_degrees(G):
+# Generator over (node,degree,2*triangles) for the nodes of G
+    for v in G:
+        vs=set(G[v])
+        vs.discard(v)
+        t=0
+        for w in vs:
+            t+=len(vs.intersection(G[w]))-(w in G[w])
+        yield (v,len(vs),t)
+
+
+def clustering_coefficient(t,d):
+# Clustering coefficient of a node with t triangles and degree d
+    if t==0:
+        return 0.0
+    return 2.0*t/(d*(d-1))
+
+
+def degree(G,v):
+# Degree of v in G ignoring self-loops
+    d=len(G[v])
+    if v in G[v]:
+        d-=1
+    return d
+
+
+def loopless(edges):
+# Returns edges without self-loops
+    return [e for e in edges if e[0]!=e[1]]
+
+
+def degree_changes(edges):
+# Returns a dict of the number of edges in 'edges' at each node
+    changes=dict()
+    for u,v in edges:
+        changes[u]=changes.get(u,0)+1
+        changes[v]=changes.get(v,0)+1
+    return changes
+
+
+def new_triangles(G,edges):
+# Returns the set of triangles in G that contain at least one of 'edges'
+    triangles=set()
+    for u,v in edges:
+        for w in G[u]:
+            if w!=u and w!=v and w in G[v]:
+                triangles.add(frozenset((u,v,w)))
+    return triangles
@@ -0,0 +1,124 @@
+#!/usr/bin/env python
+# encoding: utf-8
+"""
+instrumentation.py
+
+Opt-in profiling of SIRG runs.  A RunProfile times the phases of each
+growth iteration (motif census update, prior, candidate generation,
+candidate scoring, selection of the fittest, checkpointing), counts
+the candidates evaluated and the graph copies made, tracks peak memory
+and writes one JSON object per line for every iteration, e.g.
+
+{"event": "iteration", "iteration": 12, "seconds": 0.41,
+ "phases": {"census": 0.02, "prior": 0.0, "generation": 0.12, ...},
+ "counters": {"candidates": 100}, "nodes": 118, "edges": 240,
+ "components": 3, "peak_memory_kb": 51236}
+
+followed by a "summary" line with the totals for the whole run.
+
+Created by Drew Conway on 2010-01-25.
+Copyright (c) 2010. All rights reserved.
+"""
+
+import sys
+import os
+import json
+import time
+try:
+    import resource
+except ImportError:
+    resource=None   # Not available on Windows; peak memory is then not reported
+
+
+class RunProfile(object):
+# Collects per-iteration timings and counters, writing them as JSON
+# lines to output, a file name or an open file (default, stdout).
+# Phases are timed by calling mark(phase) at the end of each one, which
+# charges the time since the previous mark (or begin) to that phase.
+    def __init__(self,output=None):
+        if output is None:
+            output=sys.stdout
+        self.owns_output=isinstance(output,basestring)
+        if self.owns_output:
+            output=open(output,'w')
+        self.output=output
+        self.started=time.time()
+        self.iterations=0
+        self.phase_totals=dict()
+        self.counter_totals=dict()
+        self.iteration=None
+        self.phases=dict()
+        self.counters=dict()
+        self.last=self.started
+
+    def begin(self,iteration):
+    # Starts timing a growth iteration
+        self.iteration=iteration
+        self.phases=dict()
+        self.counters=dict()
+        self.iteration_start=self.last=time.time()
+
+    def mark(self,phase):
+    # Charges the time since the last mark to phase
+        now=time.time()
+        self.phases[phase]=self.phases.get(phase,0.0)+now-self.last
+        self.last=now
+
+    def count(self,counter,n=1):
+        self.counters[counter]=self.counters.get(counter,0)+n
+        self.counter_totals[counter]=self.counter_totals.get(counter,0)+n
+
+    def end(self,G,components=None):
+    # Finishes the iteration and writes its record, with the size of G
+        for phase,seconds in self.phases.items():
+            self.phase_totals[phase]=self.phase_totals.get(phase,0.0)+seconds
+        self.iterations+=1
+        self.event('iteration',
+                   iteration=self.iteration,
+                   seconds=time.time()-self.iteration_start,
+                   phases=self.phases,
+                   counters=self.counters,
+                   nodes=G.number_of_nodes(),
+                   edges=G.number_of_edges(),
+                   components=components)
+        self.iteration=None
+
+    def event(self,event,**fields):
+    # Writes a JSON line for event, with the current peak memory
+        fields['event']=event
+        fields['peak_memory_kb']=peak_memory()
+        self.output.write(json.dumps(fields,sort_keys=True)+'\n')
+        self.output.flush()
+
+    def close(self):
+    # Writes the run summary, and closes output if it was opened here
+        self.event('summary',
+                   iterations=self.iterations,
+                   seconds=time.time()-self.started,
+                   phases=self.phase_totals,
+                   counters=self.counter_totals)
+        if self.owns_output:
+            self.output.close()
+
+
+def run_profile(profile,verbose=False):
+# Returns the RunProfile for the profile argument of the generators:
+# a RunProfile, a file name or open file to write one to, or None. A
+# verbose run without a profile reports to stdout.
+    if isinstance(profile,RunProfile):
+        return profile
+    if profile:
+        return RunProfile(profile)
+    if verbose:
+        return RunProfile(sys.stdout)
+    return None
+
+
+def peak_memory():
+# Returns the peak resident memory of this process in kilobytes, or None
+    if resource is None:
+        return None
+    peak=resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform=='darwin':
+        peak/=1024  # Reported in bytes on Mac OS X
+    return peak
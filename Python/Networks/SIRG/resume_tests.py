@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+# encoding: utf-8
+"""
+resume_tests.py
+
+Checks that a SIRG run resumed from a checkpoint reproduces the run it
+was saved from, for plain and compact runs, with and without worker
+processes.  Run as a script; exits with status 1 if any check fails.
+
+Created by Drew Conway on 2009-12-15.
+Copyright (c) 2009. All rights reserved.
+"""
+
+import sys
+import os
+import tempfile
+from networkx import *
+from numpy import random
+from SIRG_dev1 import sirg_graph_generator,resume_sirg_graph_generator
+from fitness import Transitivity
+
+
+def resume_matches(base_graph,node_ceiling,resume_at,metric,seed=0,**options):
+# Grows base_graph to node_ceiling from numpy.random.seed(seed), then
+# again to resume_at with a checkpoint at every iteration, and resumes
+# that checkpoint to node_ceiling. metric is called for a fresh fitness
+# metric for each run, and options are passed to sirg_graph_generator
+# (workers also to the resumed run). Returns True if both runs end with
+# the same graph.
+    fd,path=tempfile.mkstemp(suffix='.npz')
+    os.close(fd)
+    try:
+        random.seed(seed)
+        full=sirg_graph_generator(base_graph,node_ceiling,metric(),checkpoint=None,**options)
+        random.seed(seed)
+        sirg_graph_generator(base_graph,resume_at,metric(),checkpoint=path,checkpoint_every=1,**options)
+        resumed=resume_sirg_graph_generator(path,metric(),workers=options.get('workers'),node_ceiling=node_ceiling)
+    finally:
+        os.remove(path)
+    edge_set=lambda G: set(frozenset(e) for e in G.edges_iter())
+    return set(full.nodes())==set(resumed.nodes()) and edge_set(full)==edge_set(resumed)
+
+
+def integer_label_test(seed,workers=None):
+# Resuming a run on a graph with integer labels
+    base=generators.barabasi_albert_graph(150,1,seed=seed)
+    return resume_matches(base,175,165,Transitivity,seed,workers=workers)
+
+
+def compact_label_test(seed,workers=None):
+# Resuming a compact run on a graph with string labels, which the
+# CompactGraph holds as integers
+    base=generators.barabasi_albert_graph(100,2,seed=seed)
+    base=relabel_nodes(base,dict((n,'n%d'%n) for n in base))
+    return resume_matches(base,160,130,Transitivity,seed,beta=10,compact=True,workers=workers)
+
+
+def main():
+    failed=0
+    for seed in xrange(3):
+        for workers in (None,2):
+            ok=integer_label_test(seed,workers)
+            print "Integer labels, seed %d, workers %s: %s"%(seed,workers,ok)
+            failed+=not ok
+            ok=compact_label_test(seed,workers)
+            print "Compact, string labels, seed %d, workers %s: %s"%(seed,workers,ok)
+            failed+=not ok
+    return failed>0
+
+
+if __name__ == '__main__':
+    sys.exit(main())